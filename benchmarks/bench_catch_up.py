@@ -0,0 +1,74 @@
+# Cost of catching up on missed reminder days compared with one normal run
+#
+# Usage: python benchmarks/bench_catch_up.py [--rows 1000000] [--gap 7]
+
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reminder_index import ReminderIndex, to_reminder_frame
+from reminder_schedule import compute_catch_up
+from synthetic import make_kegiatan_frame
+
+FINAL_DAYS = [7, 3]
+
+def timed(func, repeat=3):
+    """Best of `repeat` runs: (seconds, result)"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, result
+
+def normal_run(df, today):
+    """One daily run: date index build, then one lookup per rule"""
+    index = ReminderIndex(df)
+    found = [index.starting_on(today)]
+    for days_to_go in FINAL_DAYS:
+        found.append(index.ending_on(today + timedelta(days=days_to_go)))
+    return sum(len(kd) for kd in found)
+
+def rescan_days(df, last_processed, today):
+    """Catch-up by rescanning the snapshot once per missed day and rule"""
+    starts = df["tgl_rek_mulai"]
+    ends = df["tgl_rek_selesai"]
+    count = 0
+    day = last_processed + timedelta(days=1)
+    while day < today:
+        count += df.loc[starts == day.isoformat(), "kd_survei"].nunique()
+        for days_to_go in FINAL_DAYS:
+            target = day + timedelta(days=days_to_go)
+            count += df.loc[ends == target.isoformat(), "kd_survei"].nunique()
+        day += timedelta(days=1)
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description="Catch-up planning vs one normal run")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="synthetic snapshot rows")
+    parser.add_argument("--gap", type=int, default=7, help="missed days to catch up on")
+    args = parser.parse_args()
+    
+    print(f"Building {args.rows} synthetic rows...")
+    df = to_reminder_frame(make_kegiatan_frame(args.rows))
+    today = date(2024, 6, 1)
+    last_processed = today - timedelta(days=args.gap + 1)
+    
+    normal_s, _ = timed(lambda: normal_run(df, today))
+    catch_up_s, schedule = timed(
+        lambda: compute_catch_up(df, last_processed, today, FINAL_DAYS, max_days=args.gap)
+    )
+    rescan_s, _ = timed(lambda: rescan_days(df, last_processed, today), repeat=1)
+    
+    print(f"\n{args.rows} rows, {args.gap} missed days, final days {FINAL_DAYS}")
+    print(f"{'normal run':<22}{normal_s:>10.3f} s")
+    print(f"{'catch-up (index)':<22}{catch_up_s:>10.3f} s  ({len(schedule)} reminders)")
+    print(f"{'catch-up (rescan)':<22}{rescan_s:>10.3f} s")
+
+if __name__ == "__main__":
+    main()
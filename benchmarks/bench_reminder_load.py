@@ -0,0 +1,93 @@
+# Compare snapshot loading and reminder matching: full untyped frame vs the lean
+# typed loader used by send_whatsapp
+#
+# Usage: python benchmarks/bench_reminder_load.py [--rows 1000000] [--offsets 30]
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from reminder_index import ReminderIndex, load_reminder_frame
+from snapshot import load_snapshot, resolve_format, save_snapshot
+from synthetic import make_kegiatan_frame
+
+def measure(func):
+    """Return (seconds, peak traced MB, result); timed without tracemalloc, which slows allocations"""
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    del result
+    
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak / 1e6, result
+
+def frame_mb(df):
+    """Deep memory usage of a DataFrame in MB"""
+    return df.memory_usage(deep=True).sum() / 1e6
+
+def load_full(folder):
+    """Previous path: every column, dates turned into Python date objects"""
+    df = load_snapshot("api_response", folder)
+    df["tgl_rek_mulai"] = pd.to_datetime(df["tgl_rek_mulai"]).dt.date
+    df["tgl_rek_selesai"] = pd.to_datetime(df["tgl_rek_selesai"]).dt.date
+    return df
+
+def match_scan(df, today, offsets):
+    """Previous matching: one object-column comparison per reminder rule"""
+    found = [df[df["tgl_rek_mulai"] == today]["kd_survei"].unique().tolist()]
+    for days_to_go in offsets:
+        target = today + timedelta(days=days_to_go)
+        found.append(df[df["tgl_rek_selesai"] == target]["kd_survei"].unique().tolist())
+    return found
+
+def match_index(df, today, offsets):
+    """Lean matching: one vectorized index build, then dict lookups"""
+    index = ReminderIndex(df)
+    found = [index.starting_on(today)]
+    for days_to_go in offsets:
+        found.append(index.ending_on(today + timedelta(days=days_to_go)))
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(description="Lean typed loader vs full snapshot load")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="synthetic snapshot rows")
+    parser.add_argument("--offsets", type=int, default=30, help="final reminder offsets (1..N days)")
+    args = parser.parse_args()
+    
+    offsets = range(1, args.offsets + 1)
+    today = date(2024, 6, 1)
+    
+    print(f"Building {args.rows} synthetic rows...")
+    with tempfile.TemporaryDirectory() as folder:
+        save_snapshot(make_kegiatan_frame(args.rows), "api_response", folder)
+        
+        full_load, full_peak, full = measure(lambda: load_full(folder))
+        full_match, full_match_peak, full_found = measure(lambda: match_scan(full, today, offsets))
+        
+        lean_load, lean_peak, lean = measure(lambda: load_reminder_frame("api_response", folder))
+        lean_match, lean_match_peak, lean_found = measure(lambda: match_index(lean, today, offsets))
+    
+    same = [sorted(map(str, a)) for a in full_found] == [sorted(map(str, b)) for b in lean_found]
+    
+    print(f"\nSnapshot format: {resolve_format()}, {args.rows} rows, {args.offsets} offsets")
+    print(f"{'':<10}{'load s':>10}{'load peak MB':>15}{'frame MB':>12}{'match s':>10}{'match peak MB':>16}")
+    for label, load_s, load_peak, df, match_s, match_peak in (
+        ("full", full_load, full_peak, full, full_match, full_match_peak),
+        ("lean", lean_load, lean_peak, lean, lean_match, lean_match_peak),
+    ):
+        print(f"{label:<10}{load_s:>10.3f}{load_peak:>15.1f}{frame_mb(df):>12.1f}{match_s:>10.3f}{match_peak:>16.1f}")
+    print(f"\nSame reminders: {same}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# Compare snapshot read/write time against the legacy xlsx hand-off
+#
+# Usage: python benchmarks/bench_snapshot.py [--rows 100000] [--skip-xlsx]
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+from snapshot import has_pyarrow, load_snapshot, save_snapshot
+from synthetic import make_kegiatan_frame
+
+def timed(func):
+    """Run func once and return (seconds, result)"""
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+def bench_xlsx(df, folder):
+    """Legacy path: to_excel through openpyxl, read_excel + pd.to_datetime"""
+    filepath = os.path.join(folder, "api_response.xlsx")
+    write_time, _ = timed(lambda: df.to_excel(filepath, index=False, sheet_name="Data"))
+    
+    def read():
+        loaded = pd.read_excel(filepath)
+        loaded["tgl_rek_mulai"] = pd.to_datetime(loaded["tgl_rek_mulai"]).dt.date
+        loaded["tgl_rek_selesai"] = pd.to_datetime(loaded["tgl_rek_selesai"]).dt.date
+        return loaded
+    
+    read_time, _ = timed(read)
+    return write_time, read_time, os.path.getsize(filepath)
+
+def bench_snapshot(df, folder, fmt):
+    """Snapshot path: save_snapshot + load_snapshot, dates come back typed"""
+    filepath = None
+    
+    def write():
+        nonlocal filepath
+        filepath = save_snapshot(df, "api_response", folder, fmt)
+    
+    write_time, _ = timed(write)
+    read_time, loaded = timed(lambda: load_snapshot("api_response", folder, fmt))
+    assert pd.api.types.is_datetime64_any_dtype(loaded["tgl_rek_selesai"])
+    return write_time, read_time, os.path.getsize(filepath)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare snapshot read/write time against the legacy xlsx hand-off")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--skip-xlsx", action="store_true", help="skip the (slow) xlsx baseline")
+    args = parser.parse_args()
+    
+    df = make_kegiatan_frame(args.rows)
+    formats = ["parquet", "arrow", "jsonl"] if has_pyarrow() else ["jsonl"]
+    
+    print(f"Synthetic kegiatan table: {len(df)} rows")
+    print("=" * 80)
+    print(f"{'format':<10}{'write (s)':>12}{'read (s)':>12}{'size (MB)':>12}")
+    
+    with tempfile.TemporaryDirectory() as folder:
+        if not args.skip_xlsx:
+            write_time, read_time, size = bench_xlsx(df, folder)
+            print(f"{'xlsx':<10}{write_time:>12.3f}{read_time:>12.3f}{size / 1e6:>12.2f}")
+        
+        for fmt in formats:
+            write_time, read_time, size = bench_snapshot(df, folder, fmt)
+            print(f"{fmt:<10}{write_time:>12.3f}{read_time:>12.3f}{size / 1e6:>12.2f}")
+    
+    print("=" * 80)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+# Cold-start import time of the entry-point modules, via `python -X importtime`
+#
+# Usage: python benchmarks/bench_startup.py [--max-ms 150] [--top 10] [module ...]
+# Exits with status 1 when a module takes longer than --max-ms to import.
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that should import fast and without side effects
+DEFAULT_MODULES = ["config", "send_whatsapp", "download_data"]
+
+# Heavy dependencies that must not be imported at module load
+HEAVY_MODULES = ["pandas", "numpy", "pyarrow", "selenium", "seleniumwire", "openpyxl"]
+
+def measure(module, repeat=3):
+    """
+    Import a module in a fresh interpreter
+    Returns (best total microseconds, [(cumulative_us, name)] of the best run)
+    """
+    best_total = None
+    best_entries = None
+    
+    for _ in range(repeat):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"import {module} failed:\n{result.stderr}")
+        
+        entries = []
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "cumulative" in line:
+                continue
+            # Keep the name's leading spaces, they encode the nesting level
+            _, self_us, cumulative_us, name = line.replace("import time:", "|").split("|")
+            entries.append((int(cumulative_us), name[1:].rstrip()))
+        
+        total = next((us for us, name in entries if name == module), None)
+        if total is not None and (best_total is None or total < best_total):
+            best_total = total
+            best_entries = entries
+    
+    return best_total, best_entries
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start import time of the entry-point modules")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--max-ms", type=float, help="fail when a module takes longer than this")
+    parser.add_argument("--top", type=int, default=5, help="show the slowest top-level imports")
+    args = parser.parse_args()
+    
+    failed = False
+    print("=" * 80)
+    for module in args.modules:
+        total_us, entries = measure(module)
+        imported = {name.strip() for _, name in entries}
+        heavy = [name for name in HEAVY_MODULES if name in imported]
+        
+        status = ""
+        if args.max_ms is not None and total_us / 1000 > args.max_ms:
+            status = f"  ✗ over {args.max_ms:.0f} ms"
+            failed = True
+        
+        print(f"{module:<20}{total_us / 1000:>10.1f} ms{status}")
+        if heavy:
+            print(f"  heavy imports: {', '.join(heavy)}")
+        
+        # Direct children are listed just before the module, with two spaces of nesting
+        position = max(i for i, (_, name) in enumerate(entries) if name == module)
+        children = []
+        for us, name in reversed(entries[:position]):
+            if not name.startswith(" "):
+                break
+            if not name.startswith("   "):
+                children.append((us, name.strip()))
+        children.sort(reverse=True)
+        for us, name in children[:args.top]:
+            print(f"    {name:<30}{us / 1000:>8.1f} ms")
+    print("=" * 80)
+    
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
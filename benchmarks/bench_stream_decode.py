@@ -0,0 +1,80 @@
+# Compare decoding a large gzip-compressed kegiatan-aktif body in one go
+# (gzip.decompress + json.loads) with the batched stream_decode decoder
+#
+# Usage: python benchmarks/bench_stream_decode.py [--rows 500000] [--batch-size 5000]
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+import stream_decode
+from snapshot import normalize_dates
+from synthetic import make_kegiatan_records
+
+def measure(func):
+    """Return (seconds, peak traced MB, result); timed without tracemalloc, which slows allocations"""
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    del result
+    
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak / 1e6, result
+
+def decode_full(body):
+    """Previous path: whole text, whole JSON tree, then one DataFrame"""
+    response = json.loads(gzip.decompress(body).decode("utf-8"))
+    return normalize_dates(pd.DataFrame(response["data"]))
+
+def decode_batches(body, batch_size):
+    """Streamed path: one DataFrame per batch of records, concatenated"""
+    frames = [
+        normalize_dates(pd.DataFrame(records))
+        for records in stream_decode.iter_record_batches(body, batch_size)
+    ]
+    return pd.concat(frames, ignore_index=True)
+
+def count_batches(body, batch_size):
+    """Streamed decode alone, records dropped batch by batch"""
+    return sum(len(records) for records in stream_decode.iter_record_batches(body, batch_size))
+
+def main():
+    parser = argparse.ArgumentParser(description="Batched streaming decode vs json.loads of a gzip body")
+    parser.add_argument("--rows", type=int, default=500_000, help="records in the synthetic response")
+    parser.add_argument("--batch-size", type=int, default=stream_decode.STREAM_BATCH_SIZE, help="records per batch")
+    args = parser.parse_args()
+    
+    print(f"Building a {args.rows} record response...")
+    body = gzip.compress(json.dumps({"success": True, "data": make_kegiatan_records(args.rows)}).encode("utf-8"))
+    print(f"Body: {len(body) / 1e6:.1f} MB gzip")
+    
+    runs = [
+        ("json.loads", lambda: decode_full(body)),
+        ("batches", lambda: decode_batches(body, args.batch_size)),
+        ("decode only", lambda: count_batches(body, args.batch_size)),
+    ]
+    
+    print(f"\n{'':<14}{'seconds':>10}{'peak MB':>10}")
+    expected = None
+    for label, run in runs:
+        seconds, peak, result = measure(run)
+        if isinstance(result, pd.DataFrame):
+            if expected is None:
+                expected = result
+            elif not result.equals(expected):
+                print(f"WARNING: {label} decoded a different table")
+        print(f"{label:<14}{seconds:>10.3f}{peak:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+import json
+import random
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from synthetic import make_kegiatan_records
+
+class FakeServer:
+    """Base class: runs a ThreadingHTTPServer on a free local port"""
+    
+    def __init__(self):
+        self.server = None
+        self.thread = None
+    
+    def make_handler(self):
+        raise NotImplementedError
+    
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def start(self):
+        handler = self.make_handler()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+    
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, *exc):
+        self.stop()
+
+def _send_json(handler, status, data, headers=None):
+    body = json.dumps(data).encode("utf-8")
+    handler.send_response(status)
+    handler.send_header("Content-Type", "application/json")
+    handler.send_header("Content-Length", str(len(body)))
+    for name, value in (headers or {}).items():
+        handler.send_header(name, value)
+    handler.end_headers()
+    handler.wfile.write(body)
+
+class FakeKegiatanServer(FakeServer):
+    """
+    Stand-in for GET /api/dashboard/kegiatan-aktif
+    Serves a synthetic payload of `rows` records (override with ?rows=N)
+    When `token` is set, requests need `Authorization: Bearer <token>`
+    With `page_size`, answers Laravel-style pages (?page=N) after `latency` seconds
+    """
+    
+    path = "/api/dashboard/kegiatan-aktif"
+    
+    def __init__(self, rows=1000, seed=0, token=None, page_size=None, latency=0.0):
+        super().__init__()
+        self.rows = rows
+        self.seed = seed
+        self.token = token
+        self.page_size = page_size
+        self.latency = latency
+        self.payloads = {}
+        self.request_count = 0
+    
+    @property
+    def url(self):
+        return self.base_url + self.path
+    
+    def payload(self, rows):
+        """Encoded response body for a given size (built once per size)"""
+        if rows not in self.payloads:
+            data = make_kegiatan_records(rows, self.seed)
+            self.payloads[rows] = json.dumps({"success": True, "data": data}).encode("utf-8")
+        return self.payloads[rows]
+    
+    def page_payload(self, rows, page):
+        """Encoded body of one page of a paginated response"""
+        key = (rows, page)
+        if key not in self.payloads:
+            data = make_kegiatan_records(rows, self.seed)
+            last_page = max(1, -(-rows // self.page_size))
+            start = (page - 1) * self.page_size
+            self.payloads[key] = json.dumps({
+                "success": True,
+                "current_page": page,
+                "last_page": last_page,
+                "per_page": self.page_size,
+                "total": rows,
+                "data": data[start:start + self.page_size],
+            }).encode("utf-8")
+        return self.payloads[key]
+    
+    def make_handler(self):
+        fake = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fake.request_count += 1
+                parsed = urlparse(self.path)
+                if parsed.path != fake.path:
+                    return _send_json(self, 404, {"message": "not found"})
+                
+                if fake.token and self.headers.get("Authorization") != f"Bearer {fake.token}":
+                    return _send_json(self, 401, {"message": "Unauthenticated."})
+                
+                query = parse_qs(parsed.query)
+                rows = int(query.get("rows", [fake.rows])[0])
+                if fake.page_size:
+                    time.sleep(fake.latency)
+                    body = fake.page_payload(rows, int(query.get("page", [1])[0]))
+                else:
+                    body = fake.payload(rows)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        return Handler
+
+class FakeWppServer(FakeServer):
+    """
+    Stand-in for the WPPConnect server
+    Every send waits `latency` seconds and fails with HTTP 500 with
+    probability `error_rate`; /api/sendMessages answers per item and sends
+    `batch_concurrency` items at a time, paced at the request's ratePerSecond,
+    like server.js
+    flap(down, up) makes the WhatsApp session drop (503) and reconnect in a loop;
+    fail_next(status, count) answers the next sends with an error status
+    """
+    
+    def __init__(self, latency=0.05, error_rate=0.0, seed=0, batch_concurrency=4):
+        super().__init__()
+        self.latency = latency
+        self.batch_concurrency = batch_concurrency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+        self.connected = True
+        self.sent = []
+        self.sent_lock = threading.Lock()
+        self.flapping = None
+        self.rejected = 0
+        self.injected = deque()
+        self.injected_lock = threading.Lock()
+    
+    @property
+    def send_url(self):
+        return self.base_url + "/api/sendMessage"
+    
+    @property
+    def batch_url(self):
+        return self.base_url + "/api/sendMessages"
+    
+    def flap(self, down=1.0, up=1.0):
+        """Alternate `down` seconds disconnected and `up` seconds connected until stop()"""
+        stopped = threading.Event()
+        
+        def loop():
+            while True:
+                self.connected = False
+                if stopped.wait(down):
+                    break
+                self.connected = True
+                if stopped.wait(up):
+                    break
+            self.connected = True
+        
+        self.flapping = stopped
+        threading.Thread(target=loop, daemon=True).start()
+        return self
+    
+    def stop(self):
+        if self.flapping:
+            self.flapping.set()
+            self.flapping = None
+        super().stop()
+    
+    def fail_next(self, status=500, count=1, retry_after=None):
+        """Answer the next `count` sends with `status` (and a Retry-After header when given)"""
+        with self.injected_lock:
+            self.injected.extend([(status, retry_after)] * count)
+        return self
+    
+    def next_injected(self):
+        with self.injected_lock:
+            return self.injected.popleft() if self.injected else None
+    
+    def fails(self):
+        with self.random_lock:
+            return self.random.random() < self.error_rate
+    
+    def make_handler(self):
+        fake = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            
+            def do_GET(self):
+                if self.path == "/api/health":
+                    if fake.connected:
+                        return _send_json(self, 200, {"status": "connected"})
+                    return _send_json(self, 503, {"status": "disconnected"})
+                _send_json(self, 404, {"success": False})
+            
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                
+                if not fake.connected:
+                    fake.rejected += 1
+                    return _send_json(self, 503, {"success": False, "error": "WhatsApp client not connected"})
+                
+                injected = fake.next_injected()
+                if injected:
+                    status, retry_after = injected
+                    fake.rejected += 1
+                    headers = {"Retry-After": str(retry_after)} if retry_after is not None else {}
+                    return _send_json(self, status, {"success": False, "error": "injected failure"}, headers)
+                
+                if self.path == "/api/sendMessage":
+                    time.sleep(fake.latency)
+                    if fake.fails():
+                        return _send_json(self, 500, {"success": False, "error": "fake failure"})
+                    with fake.sent_lock:
+                        fake.sent.append(body.get("phone"))
+                    return _send_json(self, 200, {"success": True, "phone": body.get("phone")})
+                
+                if self.path == "/api/sendMessages":
+                    messages = body.get("messages", [])
+                    rounds = -(-len(messages) // max(1, fake.batch_concurrency))
+                    rate = body.get("ratePerSecond") or 0
+                    paced = (len(messages) - 1) / rate if rate > 0 else 0
+                    time.sleep(max(fake.latency * rounds, paced))
+                    
+                    results = []
+                    for index, item in enumerate(messages):
+                        success = not fake.fails()
+                        if success:
+                            with fake.sent_lock:
+                                fake.sent.append(item.get("phone"))
+                        results.append({"index": index, "phone": item.get("phone"), "success": success})
+                    sent = sum(1 for r in results if r["success"])
+                    return _send_json(self, 200, {
+                        "success": sent == len(results),
+                        "sent": sent,
+                        "failed": len(results) - sent,
+                        "results": results
+                    })
+                
+                _send_json(self, 404, {"success": False})
+            
+            def log_message(self, format, *args):
+                pass
+        
+        return Handler
@@ -0,0 +1,283 @@
+# End-to-end benchmark of the reminder pipeline against local fake servers
+#
+# Measures API fetch, snapshot save/load, reminder computation and dispatch
+# throughput, and writes the results as JSON so runs can be compared across
+# commits.
+#
+# Usage: python benchmarks/run_benchmarks.py [--rows 100000] [--page-size 5000] [--contacts 200]
+#            [--latency 0.05] [--error-rate 0.0] [--flap DOWN UP] [--output FILE] [--baseline FILE]
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pandas as pd
+
+from fake_servers import FakeKegiatanServer, FakeWppServer
+from synthetic import midpoint_date
+
+def git_commit():
+    """Short hash of the current commit, or None outside git"""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+def timed(func, repeat=1):
+    """Best wall time of `repeat` runs, and the last result"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+@contextlib.contextmanager
+def quiet():
+    """Silence the pipeline's progress prints"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+def bench_fetch(rows):
+    """Direct API fetch of a synthetic kegiatan-aktif payload"""
+    from dispatch import get_http_session
+    from kegiatan_api import fetch_kegiatan_aktif
+    
+    with FakeKegiatanServer(rows, token="bench") as server:
+        # Build the payload up front so only the transfer and decode are timed
+        server.payload(rows)
+        session_data = {"headers": {"Authorization": "Bearer bench"}}
+        seconds, payload = timed(lambda: fetch_kegiatan_aktif(session_data, server.url, http=get_http_session()))
+    
+    return {"seconds": seconds, "records": len(payload["data"])}, payload["data"]
+
+def bench_paged_fetch(rows, page_size, latency):
+    """Fetch of a paginated payload, one page at a time and with the page pool"""
+    from dispatch import get_http_session
+    from kegiatan_api import FETCH_WORKERS, fetch_kegiatan_aktif, iter_pages
+    
+    with FakeKegiatanServer(rows, token="bench", page_size=page_size, latency=latency) as server:
+        session_data = {"headers": {"Authorization": "Bearer bench"}}
+        http = get_http_session()
+        
+        def fetch(workers):
+            first = fetch_kegiatan_aktif(session_data, server.url, http=http)
+            return sum(len(records) for records in iter_pages(session_data, first, server.url, http, workers))
+        
+        sequential_seconds, records = timed(lambda: fetch(1))
+        parallel_seconds, _ = timed(lambda: fetch(FETCH_WORKERS))
+    
+    return {
+        "pages": -(-rows // page_size),
+        "records": records,
+        "workers": FETCH_WORKERS,
+        "sequential_seconds": sequential_seconds,
+        "parallel_seconds": parallel_seconds,
+    }
+
+def bench_snapshot(records, folder):
+    """Snapshot save and load of the fetched records"""
+    from snapshot import load_snapshot, resolve_format, save_snapshot
+    
+    df = pd.DataFrame(records)
+    save_seconds, _ = timed(lambda: save_snapshot(df, "api_response", folder))
+    load_seconds, loaded = timed(lambda: load_snapshot("api_response", folder), repeat=3)
+    
+    return {
+        "format": resolve_format(),
+        "save_seconds": save_seconds,
+        "load_seconds": load_seconds,
+    }, loaded
+
+def bench_reminders(df, offsets):
+    """
+    get_final_reminder_message and get_initial_reminder_message over the snapshot
+    "Today" is pinned to the middle of the synthetic date range, so every lookup finds reminders
+    """
+    import send_whatsapp
+    from reminder_index import ReminderIndex
+    
+    send_whatsapp.FINAL_REMINDER_DAYS = list(offsets)
+    send_whatsapp.DEBUG_DATE = midpoint_date().isoformat()
+    
+    with quiet():
+        index_seconds, index = timed(lambda: ReminderIndex(df), repeat=3)
+        final_seconds, final = timed(lambda: send_whatsapp.get_final_reminder_message(df), repeat=3)
+        final_indexed_seconds, _ = timed(lambda: send_whatsapp.get_final_reminder_message(df, index), repeat=3)
+        initial_seconds, initial = timed(lambda: send_whatsapp.get_initial_reminder_message(df), repeat=3)
+        initial_indexed_seconds, _ = timed(lambda: send_whatsapp.get_initial_reminder_message(df, index), repeat=3)
+    
+    assert final, f"no final reminders due on {send_whatsapp.DEBUG_DATE}, the lookups measured nothing"
+    
+    return {
+        "offsets": len(offsets),
+        "date": send_whatsapp.DEBUG_DATE,
+        "final_reminders": len(final),
+        "initial_reminder": bool(initial),
+        "index_build_seconds": index_seconds,
+        "final_seconds": final_seconds,
+        "final_indexed_seconds": final_indexed_seconds,
+        "initial_seconds": initial_seconds,
+        "initial_indexed_seconds": initial_indexed_seconds,
+    }
+
+def bench_dispatch(contacts, latency, error_rate, rate, workers, batch_size):
+    """Dispatch throughput, per-message and batched, against a fake WPPConnect"""
+    import send_whatsapp
+    from dispatch import dispatch_batches, dispatch_messages
+    
+    contact_list = [{"phone": f"62800{i:07d}", "name": f"Kontak {i}"} for i in range(contacts)]
+    message = "Pesan benchmark"
+    results = {}
+    
+    with FakeWppServer(latency=latency, error_rate=error_rate) as server:
+        send_whatsapp.WPPCONNECT_URL = server.send_url
+        send_whatsapp.WPPCONNECT_BATCH_URL = server.batch_url
+        
+        with quiet():
+            seconds, sent = timed(lambda: dispatch_messages(
+                contact_list, message, send_whatsapp.send_whatsapp_message,
+                messages_per_second=rate, max_workers=workers
+            ))
+        results["per_message"] = {
+            "seconds": seconds,
+            "messages_per_second": contacts / seconds,
+            "failed": sum(1 for r in sent if r["status"] == "Failed"),
+        }
+        
+        with quiet():
+            seconds, sent = timed(lambda: dispatch_batches(
+                [(contact, message) for contact in contact_list], send_whatsapp.send_whatsapp_batch,
+                batch_size=batch_size, messages_per_second=rate
+            ))
+        results["batched"] = {
+            "seconds": seconds,
+            "messages_per_second": contacts / seconds,
+            "failed": sum(1 for r in sent if r["status"] == "Failed"),
+        }
+    
+    return results
+
+def bench_flapping(contacts, latency, down, up, workers):
+    """Dispatch through the SendGuard while the fake WhatsApp session drops and reconnects"""
+    import send_whatsapp
+    from dispatch import SendGuard, dispatch_messages
+    
+    contact_list = [{"phone": f"62800{i:07d}", "name": f"Kontak {i}"} for i in range(contacts)]
+    
+    with FakeWppServer(latency=latency) as server:
+        send_whatsapp.WPPCONNECT_URL = server.send_url
+        send_whatsapp.WPPCONNECT_HEALTH_URL = server.base_url + "/api/health"
+        guard = SendGuard(
+            health_check=send_whatsapp.check_wppconnect_health,
+            max_retries=3, base_delay=0.05, max_delay=up,
+            failure_threshold=3, probe_interval=up / 4, max_pause=down * 4, seed=0
+        )
+        server.flap(down, up)
+        
+        with quiet():
+            guard.check_health()
+            seconds, sent = timed(lambda: dispatch_messages(
+                contact_list, "Pesan benchmark", send_whatsapp.send_whatsapp_message,
+                messages_per_second=1000, max_workers=workers, guard=guard
+            ))
+    
+    return {
+        "seconds": seconds,
+        "down_seconds": down,
+        "up_seconds": up,
+        "sent": sum(1 for r in sent if r["status"] == "Sent"),
+        "failed": sum(1 for r in sent if r["status"] == "Failed"),
+        "rejected_requests": server.rejected,
+    }
+
+def flatten(data, prefix=""):
+    """Flatten nested result dicts into dotted keys"""
+    flat = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+def compare(results, baseline_path):
+    """Print timing ratios against a previous results file"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = flatten(json.load(f)["results"])
+    current = flatten(results)
+    
+    print(f"\nCompared with {baseline_path} (ratio > 1 means slower now):")
+    for key, value in current.items():
+        if key.endswith("seconds") and baseline.get(key):
+            print(f"  {key:<45}{value / baseline[key]:>8.2f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end benchmark of the reminder pipeline")
+    parser.add_argument("--rows", type=int, default=100_000, help="kegiatan records in the fake API payload")
+    parser.add_argument("--page-size", type=int, default=5000, help="records per page of the paginated fetch")
+    parser.add_argument("--page-latency", type=float, default=0.1, help="fake API seconds per page")
+    parser.add_argument("--offsets", type=int, default=30, help="number of final reminder offsets (1..N days)")
+    parser.add_argument("--contacts", type=int, default=200, help="recipients for the dispatch benchmark")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake WPPConnect seconds per send")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fake WPPConnect failure probability")
+    parser.add_argument("--rate", type=float, default=1000, help="dispatch messages per second limit")
+    parser.add_argument("--workers", type=int, default=4, help="dispatch worker threads")
+    parser.add_argument("--flap", type=float, nargs=2, metavar=("DOWN", "UP"), default=[1.0, 1.0],
+                        help="seconds the fake WhatsApp session stays down and up in the flapping run")
+    parser.add_argument("--batch-size", type=int, default=50, help="messages per batch request")
+    parser.add_argument("--output", help="results file (default result/benchmarks/<commit>.json)")
+    parser.add_argument("--baseline", help="previous results file to compare against")
+    args = parser.parse_args()
+    
+    commit = git_commit()
+    results = {}
+    
+    with tempfile.TemporaryDirectory() as folder:
+        results["fetch"], records = bench_fetch(args.rows)
+        results["paged_fetch"] = bench_paged_fetch(args.rows, args.page_size, args.page_latency)
+        results["snapshot"], df = bench_snapshot(records, folder)
+        results["reminders"] = bench_reminders(df, range(1, args.offsets + 1))
+        results["dispatch"] = bench_dispatch(
+            args.contacts, args.latency, args.error_rate, args.rate, args.workers, args.batch_size
+        )
+        results["flapping"] = bench_flapping(args.contacts, args.latency, args.flap[0], args.flap[1], args.workers)
+    
+    report = {
+        "commit": commit,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "parameters": vars(args),
+        "results": results,
+    }
+    
+    output = args.output or os.path.join(ROOT, "result", "benchmarks", f"{commit or 'local'}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    
+    print(json.dumps(results, indent=2))
+    print(f"\nResults written to {output}")
+    
+    if args.baseline:
+        compare(results, args.baseline)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+def make_kegiatan_records(rows=100_000, seed=0, start="2024-01-01", days=730):
+    """
+    Build a synthetic kegiatan-aktif `data` list shaped like the dashboard API
+    Dates are ISO strings, as they come over the wire
+    """
+    rng = np.random.default_rng(seed)
+    survey_count = max(1, rows // 20)
+    
+    kd_survei = rng.integers(0, survey_count, size=rows)
+    start_offsets = rng.integers(0, days, size=rows)
+    durations = rng.integers(7, 60, size=rows)
+    
+    base = np.datetime64(start, "D")
+    tgl_rek_mulai = base + start_offsets.astype("timedelta64[D]")
+    tgl_rek_selesai = tgl_rek_mulai + durations.astype("timedelta64[D]")
+    
+    records = []
+    for i in range(rows):
+        records.append({
+            "id": i + 1,
+            "kd_survei": f"SUR{kd_survei[i]:05d}",
+            "nama_survei": f"Survei Sintetis {kd_survei[i]}",
+            "kd_kegiatan": f"KEG{i:07d}",
+            "nama_kegiatan": f"Kegiatan Pendataan {i}",
+            "tgl_rek_mulai": str(tgl_rek_mulai[i]),
+            "tgl_rek_selesai": str(tgl_rek_selesai[i]),
+            "status": "aktif" if i % 7 else "selesai",
+        })
+    return records
+
+def make_kegiatan_frame(rows=100_000, seed=0, start="2024-01-01", days=730):
+    """Synthetic kegiatan table as a DataFrame (dates still as strings)"""
+    return pd.DataFrame(make_kegiatan_records(rows, seed, start, days))
+
+def midpoint_date(start="2024-01-01", days=730):
+    """Middle of the synthetic date range, a day with reminders due for every rule"""
+    return date.fromisoformat(start) + timedelta(days=days // 2)
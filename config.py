@@ -0,0 +1,56 @@
+import os
+
+# Shared settings of download_data.py and send_whatsapp.py
+# Keep this module free of heavy imports and import-time side effects
+
+# Folder for snapshots, results and other run state
+RESULT_FOLDER = "result"
+
+# WPPConnect API endpoints
+WPPCONNECT_URL = "http://localhost:21465/api/sendMessage"
+WPPCONNECT_BATCH_URL = "http://localhost:21465/api/sendMessages"
+WPPCONNECT_HEALTH_URL = "http://localhost:21465/api/health"
+
+# Hardcoded contacts (fallback when there is no contact registry file)
+CONTACTS = [
+    # {"phone": "6282379883130", "name": "Ali", "type": "user"},
+    {"phone": "6282236981385", "name": "Indra", "type": "admin"},
+    # {"phone": "6281331890887", "name": "Sani", "type": "admin"},
+]
+
+# Contact registry with per-survey subscriptions (CSV or SQLite)
+# When the file doesn't exist, CONTACTS above get every reminder
+CONTACTS_FILE = "contacts.csv"
+SURVEY_GROUPS_FILE = "survey_groups.csv"
+
+# Debug mode: set the DEBUG_DATE environment variable to a specific date to test
+# (e.g., "2024-01-15"); unset means today
+DEBUG_DATE = os.environ.get("DEBUG_DATE") or None
+
+# Reminder settings
+ENABLE_INITIAL_REMINDER = False  # Enable/disable initial reminder (surveys starting today)
+FINAL_REMINDER_DAYS = [7, 3]  # Send reminder when 7 days or 3 days to go
+DIGEST_MODE = True  # Send each recipient one digest of all of today's reminders
+MESSAGE_MAX_LENGTH = 4096  # Longer digests are split into several messages
+CATCH_UP_MAX_DAYS = 7  # Reminders missed on at most this many previous days are sent late
+
+# Dispatch settings
+MESSAGES_PER_SECOND = 1  # Maximum sending rate across all workers
+DISPATCH_WORKERS = 4  # Number of concurrent sending workers
+SEND_TIMEOUT = 30  # Seconds to wait for WPPConnect to answer a send
+SEND_CONNECT_TIMEOUT = 5  # Seconds to wait for a connection to WPPConnect
+USE_BATCH_ENDPOINT = True  # Send through /api/sendMessages, several recipients per request
+SEND_BATCH_SIZE = 50  # Messages per batch request
+
+# Backpressure against WPPConnect (5xx, 429, connection errors)
+SEND_MAX_RETRIES = 3  # Retries of a send that failed transiently
+BACKOFF_BASE_DELAY = 1.0  # First retry delay in seconds, doubled per consecutive failure
+BACKOFF_MAX_DELAY = 30.0  # Upper bound of a retry delay
+CIRCUIT_FAILURE_THRESHOLD = 5  # Consecutive failures that pause dispatch
+CIRCUIT_PROBE_INTERVAL = 5.0  # Seconds between health checks while paused
+CIRCUIT_MAX_PAUSE = 300.0  # Give up on the run after WPPConnect is down this long
+
+def ensure_result_folder():
+    """Create the result folder if it doesn't exist"""
+    os.makedirs(RESULT_FOLDER, exist_ok=True)
+    return RESULT_FOLDER
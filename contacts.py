@@ -0,0 +1,162 @@
+import csv
+import os
+import sqlite3
+
+from config import CONTACTS, CONTACTS_FILE, SURVEY_GROUPS_FILE
+
+# Subscription matching every survey
+WILDCARD = "*"
+
+# Prefix of a subscription to a survey group
+GROUP_PREFIX = "group:"
+
+def split_subscriptions(value):
+    """Split a `;`/`,` separated subscription cell into targets"""
+    if not value:
+        return []
+    return [target.strip() for target in str(value).replace(",", ";").split(";") if target.strip()]
+
+def read_contacts_csv(path):
+    """
+    Read contacts from CSV with columns phone, name, type, subscriptions
+    Returns (contacts, subscriptions) where subscriptions is [(phone, target)]
+    """
+    contacts = []
+    subscriptions = []
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        for row in csv.DictReader(f):
+            phone = (row.get("phone") or "").strip()
+            if not phone:
+                continue
+            contacts.append({
+                "phone": phone,
+                "name": (row.get("name") or phone).strip(),
+                "type": (row.get("type") or "user").strip(),
+            })
+            for target in split_subscriptions(row.get("subscriptions")):
+                subscriptions.append((phone, target))
+    return contacts, subscriptions
+
+def read_contacts_sqlite(path):
+    """
+    Read contacts from SQLite tables contacts(phone, name, type) and
+    subscriptions(phone, target)
+    """
+    conn = sqlite3.connect(path)
+    try:
+        contacts = [
+            {"phone": phone, "name": name or phone, "type": kind or "user"}
+            for phone, name, kind in conn.execute("SELECT phone, name, type FROM contacts")
+        ]
+        subscriptions = list(conn.execute("SELECT phone, target FROM subscriptions"))
+    finally:
+        conn.close()
+    return contacts, subscriptions
+
+def read_survey_groups(path):
+    """Read survey groups from CSV with columns group, kd_survei ("SUS*" matches a prefix)"""
+    groups = []
+    if not path or not os.path.exists(path):
+        return groups
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        for row in csv.DictReader(f):
+            group = (row.get("group") or "").strip()
+            kd = (row.get("kd_survei") or "").strip()
+            if group and kd:
+                groups.append((group, kd))
+    return groups
+
+class ContactRegistry:
+    """
+    Contacts with per-survey subscriptions and a kd_survei -> recipients index
+    A subscription target is a kd_survei, a "SUS*" prefix, "group:<name>" or "*"
+    """
+    
+    def __init__(self, contacts, subscriptions=(), groups=()):
+        self.contacts = {c["phone"]: c for c in contacts}
+        self.wildcard = []
+        self.by_survey = {}
+        self.by_prefix = {}
+        self.group_members = {}
+        self.routes = {}
+        
+        for phone, target in subscriptions:
+            if phone not in self.contacts:
+                continue
+            if target == WILDCARD:
+                self.wildcard.append(phone)
+            elif target.startswith(GROUP_PREFIX):
+                self.group_members.setdefault(target[len(GROUP_PREFIX):], []).append(phone)
+            elif target.endswith(WILDCARD):
+                self.by_prefix.setdefault(target[:-1], []).append(phone)
+            else:
+                self.by_survey.setdefault(target, []).append(phone)
+        
+        # Resolve groups into the survey and prefix indexes once
+        for group, kd in groups:
+            members = self.group_members.get(group, [])
+            if not members:
+                continue
+            if kd.endswith(WILDCARD):
+                self.by_prefix.setdefault(kd[:-1], []).extend(members)
+            else:
+                self.by_survey.setdefault(kd, []).extend(members)
+        
+        self.prefixes = sorted(self.by_prefix)
+    
+    def recipients_for(self, kd_survei):
+        """Phones subscribed to a kd_survei (memoized)"""
+        kd_survei = str(kd_survei)
+        recipients = self.routes.get(kd_survei)
+        if recipients is None:
+            phones = list(self.wildcard)
+            phones.extend(self.by_survey.get(kd_survei, ()))
+            for prefix in self.prefixes:
+                if kd_survei.startswith(prefix):
+                    phones.extend(self.by_prefix[prefix])
+            recipients = tuple(dict.fromkeys(phones))
+            self.routes[kd_survei] = recipients
+        return recipients
+    
+    def route(self, kd_survei_list):
+        """
+        Map each recipient to the kd_survei it should hear about
+        Returns {phone: [kd_survei, ...]} keeping the order of kd_survei_list
+        """
+        routed = {}
+        for kd in kd_survei_list:
+            for phone in self.recipients_for(kd):
+                routed.setdefault(phone, []).append(kd)
+        return routed
+    
+    def route_groups(self, kd_survei_list):
+        """
+        Group recipients that get the same kd_survei subset
+        Returns [(kd_survei_subset, [contact, ...])], so one message per subset
+        """
+        groups = {}
+        for phone, kds in self.route(kd_survei_list).items():
+            groups.setdefault(tuple(kds), []).append(self.contacts[phone])
+        return [(list(kds), contacts) for kds, contacts in groups.items()]
+    
+    def admins(self):
+        """Contacts of type admin"""
+        return [c for c in self.contacts.values() if c.get("type") == "admin"]
+
+def load_registry(path=None, groups_path=None):
+    """
+    Load the contact registry from CSV or SQLite
+    Falls back to config.CONTACTS, every contact subscribed to every survey,
+    when there is no registry file
+    """
+    path = path or CONTACTS_FILE
+    groups = read_survey_groups(groups_path or SURVEY_GROUPS_FILE)
+    
+    if path and os.path.exists(path):
+        if path.endswith((".db", ".sqlite", ".sqlite3")):
+            contacts, subscriptions = read_contacts_sqlite(path)
+        else:
+            contacts, subscriptions = read_contacts_csv(path)
+        return ContactRegistry(contacts, subscriptions, groups)
+    
+    return ContactRegistry(CONTACTS, [(c["phone"], WILDCARD) for c in CONTACTS], groups)
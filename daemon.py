@@ -0,0 +1,220 @@
+# Long-running reminder daemon
+#
+# Runs download -> remind cycles in-process on a daily schedule, keeping the
+# HTTP session, auth session, outbox and snapshot index warm between cycles.
+#
+# Usage: python daemon.py [--times 07:00,15:00] [--status-port 8765] [--once]
+
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import download_data
+import metrics
+import send_whatsapp
+from reminder_index import ReminderIndex
+from snapshot import find_snapshot
+
+# Daily run times (HH:MM, local time)
+SCHEDULE_TIMES = ["07:00"]
+
+# Status of the daemon, rewritten after every change
+STATUS_FILE = os.path.join("result", "daemon_status.json")
+
+def parse_times(times):
+    """Parse HH:MM strings into sorted (hour, minute) tuples"""
+    parsed = []
+    for value in times:
+        hour, minute = value.strip().split(":")
+        parsed.append((int(hour), int(minute)))
+    return sorted(set(parsed))
+
+def next_run_after(now, times):
+    """Next scheduled datetime strictly after now"""
+    for day in range(2):
+        date = (now + timedelta(days=day)).date()
+        for hour, minute in times:
+            candidate = datetime(date.year, date.month, date.day, hour, minute)
+            if candidate > now:
+                return candidate
+    return None
+
+class ReminderDaemon:
+    """
+    In-process scheduler for download -> remind cycles
+    The loaded snapshot and its ReminderIndex are reused while the snapshot
+    file is unchanged
+    """
+    
+    def __init__(self, times=None, status_file=STATUS_FILE):
+        self.times = parse_times(times or SCHEDULE_TIMES)
+        self.status_file = status_file
+        self.stop_event = threading.Event()
+        self.lock = threading.Lock()
+        self.snapshot_key = None
+        self.df = None
+        self.index = None
+        self.status = {
+            "state": "idle",
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "cycles": 0,
+            "next_run": None,
+            "last_run": None,
+        }
+    
+    def get_status(self):
+        """Copy of the current status"""
+        with self.lock:
+            return json.loads(json.dumps(self.status))
+    
+    def update_status(self, **fields):
+        """Update the status and persist it to the status file"""
+        with self.lock:
+            self.status.update(fields)
+            status = json.dumps(self.status, indent=2)
+        try:
+            os.makedirs(os.path.dirname(self.status_file) or ".", exist_ok=True)
+            tmp_path = self.status_file + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(status)
+            os.replace(tmp_path, self.status_file)
+        except Exception as e:
+            print(f"WARNING: Failed to write daemon status - {str(e)}")
+    
+    def load_snapshot(self):
+        """Return (df, index), reloading only when the snapshot file changed"""
+        filepath, _ = find_snapshot("api_response", send_whatsapp.RESULT_FOLDER)
+        if filepath is None:
+            return None, None
+        
+        key = (filepath, os.path.getmtime(filepath))
+        if key != self.snapshot_key:
+            df = send_whatsapp.read_snapshot_file()
+            if df is None:
+                return None, None
+            self.df = df
+            self.index = ReminderIndex(df)
+            self.snapshot_key = key
+        return self.df, self.index
+    
+    def run_cycle(self):
+        """One download -> remind cycle"""
+        started = time.perf_counter()
+        last_run = {"started_at": datetime.now().isoformat(timespec="seconds")}
+        self.update_status(state="running")
+        metrics.reset()
+        
+        try:
+            last_run["downloaded"] = download_data.downloadSnapshot()
+            
+            df, index = self.load_snapshot()
+            if df is None:
+                raise RuntimeError("No snapshot available")
+            
+            results = send_whatsapp.run_reminders(df, index) or []
+            send_whatsapp.get_outbox().flush()
+            
+            last_run["sent"] = sum(1 for r in results if r["status"] == "Sent")
+            last_run["failed"] = sum(1 for r in results if r["status"] == "Failed")
+            last_run["ok"] = True
+        except Exception as e:
+            traceback.print_exc()
+            last_run["ok"] = False
+            last_run["error"] = str(e)
+        
+        last_run["finished_at"] = datetime.now().isoformat(timespec="seconds")
+        last_run["duration_seconds"] = round(time.perf_counter() - started, 3)
+        metrics.write_metrics("daemon")
+        self.update_status(state="idle", last_run=last_run, cycles=self.status["cycles"] + 1)
+        return last_run
+    
+    def run_forever(self):
+        """Run cycles at the scheduled times until stop() is called"""
+        while not self.stop_event.is_set():
+            next_run = next_run_after(datetime.now(), self.times)
+            self.update_status(state="idle", next_run=next_run.isoformat(timespec="seconds"))
+            print(f"Next run at {next_run}")
+            
+            # Wake up early if stopped
+            while not self.stop_event.is_set():
+                remaining = (next_run - datetime.now()).total_seconds()
+                if remaining <= 0:
+                    break
+                self.stop_event.wait(min(remaining, 60))
+            
+            if not self.stop_event.is_set():
+                self.run_cycle()
+        
+        self.update_status(state="stopped", next_run=None)
+        send_whatsapp.close_outbox()
+        send_whatsapp.close_history()
+    
+    def stop(self):
+        """Ask run_forever to return"""
+        self.stop_event.set()
+
+def serve_status(daemon, port):
+    """Serve the daemon status as JSON on GET /status"""
+    
+    class StatusHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") not in ("", "/status"):
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = json.dumps(daemon.get_status()).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, format, *args):
+            pass
+    
+    server = ThreadingHTTPServer(("127.0.0.1", port), StatusHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Daemon status on http://127.0.0.1:{port}/status")
+    return server
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Long-running reminder daemon")
+    parser.add_argument("--times", help="comma separated daily run times (HH:MM)")
+    parser.add_argument("--status-port", type=int, help="serve status JSON on this port")
+    parser.add_argument("--once", action="store_true", help="run one cycle now and exit")
+    args = parser.parse_args()
+    
+    if send_whatsapp.DEBUG_DATE:
+        # Every cycle would remind for (and mark processed) the same fixed day
+        if not args.once:
+            print(f"ERROR: DEBUG_DATE is set ({send_whatsapp.DEBUG_DATE}), refusing to run the daemon. Unset it or use --once.")
+            sys.exit(1)
+        print(f"WARNING: DEBUG_DATE is set, this cycle reminds for {send_whatsapp.DEBUG_DATE}, not today")
+    
+    times = args.times.split(",") if args.times else SCHEDULE_TIMES
+    daemon = ReminderDaemon(times)
+    
+    if args.once:
+        daemon.run_cycle()
+        send_whatsapp.close_outbox()
+        send_whatsapp.close_history()
+        return
+    
+    if args.status_port:
+        serve_status(daemon, args.status_port)
+    
+    signal.signal(signal.SIGTERM, lambda signum, frame: daemon.stop())
+    signal.signal(signal.SIGINT, lambda signum, frame: daemon.stop())
+    
+    daemon.run_forever()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+import json
+import os
+import time
+
+import pandas as pd
+
+from snapshot import find_snapshot, load_snapshot, normalize_dates, save_snapshot
+
+# Records are identified by this column
+KEY_COLUMN = "kd_survei"
+
+# Change log with one JSON line per sync
+CHANGE_LOG_FILE = "change_log.jsonl"
+
+def fingerprint(df, key=KEY_COLUMN):
+    """
+    Content hash of every kd_survei in df
+    Rows sharing a kd_survei are hashed together, independent of row order;
+    rows without a kd_survei are hashed together as one NaN group
+    Returns a Series indexed by kd_survei
+    """
+    if df is None or df.empty:
+        return pd.Series(dtype="uint64")
+    
+    columns = sorted(str(c) for c in df.columns)
+    content = df[columns].astype("string").fillna("")
+    row_hashes = pd.util.hash_pandas_object(content, index=False)
+    
+    # Sum of row hashes (wrapping uint64) is order independent
+    return row_hashes.groupby(df[key].to_numpy(), dropna=False).sum()
+
+def compute_delta(previous_df, current_df, key=KEY_COLUMN):
+    """
+    Compare two snapshots
+    Returns a dict of added, changed and removed DataFrames (rows of the
+    current snapshot for added/changed, of the previous one for removed)
+    """
+    previous_hashes = fingerprint(previous_df, key)
+    current_hashes = fingerprint(current_df, key)
+    
+    added_keys = current_hashes.index.difference(previous_hashes.index)
+    removed_keys = previous_hashes.index.difference(current_hashes.index)
+    common_keys = current_hashes.index.intersection(previous_hashes.index)
+    changed_keys = common_keys[current_hashes[common_keys].to_numpy() != previous_hashes[common_keys].to_numpy()]
+    
+    empty = current_df.iloc[0:0] if current_df is not None else pd.DataFrame()
+    return {
+        "added": current_df[current_df[key].isin(added_keys)] if len(added_keys) else empty,
+        "changed": current_df[current_df[key].isin(changed_keys)] if len(changed_keys) else empty,
+        "removed": previous_df[previous_df[key].isin(removed_keys)] if len(removed_keys) else empty,
+    }
+
+def has_changes(delta):
+    """Check whether a delta contains any added, changed or removed rows"""
+    return any(not rows.empty for rows in delta.values())
+
+def write_change_log(delta, folder="result", filename=CHANGE_LOG_FILE, key=KEY_COLUMN, unkeyed_rows=0):
+    """Append a compact summary of a delta to the change log"""
+    entry = {"synced_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    for change, rows in delta.items():
+        entry[change] = sorted(str(kd) for kd in rows[key].dropna().unique()) if not rows.empty else []
+    entry["rows_without_key"] = unkeyed_rows
+    
+    filepath = os.path.join(folder, filename)
+    with open(filepath, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    return entry
+
+def sync_snapshot(df, name="api_response", folder="result", key=KEY_COLUMN):
+    """
+    Delta-sync a freshly downloaded table against the previous snapshot
+    The delta only decides whether anything changed: the snapshot (and the
+    optional Excel export) is rewritten whole when it did, and left alone
+    when it didn't; the change log records what changed
+    Returns the delta dict
+    """
+    current_df = normalize_dates(df.copy())
+    
+    unkeyed_rows = int(current_df[key].isna().sum()) if key in current_df.columns else 0
+    if unkeyed_rows:
+        print(f"WARNING: {unkeyed_rows} row(s) without {key}, compared as one group")
+    
+    previous_path, _ = find_snapshot(name, folder)
+    previous_df = load_snapshot(name, folder) if previous_path else None
+    if previous_df is not None:
+        previous_df = normalize_dates(previous_df)
+    
+    delta = compute_delta(previous_df, current_df, key)
+    
+    if has_changes(delta):
+        save_snapshot(current_df, name, folder)
+        write_change_log(delta, folder, key=key, unkeyed_rows=unkeyed_rows)
+    
+    return delta
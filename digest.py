@@ -0,0 +1,94 @@
+from config import MESSAGE_MAX_LENGTH
+
+# Blank line between the sections of a digest
+SECTION_SEPARATOR = "\n\n"
+
+def split_text(text, max_length):
+    """Split one text longer than max_length at line breaks (hard split for very long lines)"""
+    parts = []
+    current = ""
+    for line in text.split("\n"):
+        while len(line) > max_length:
+            if current:
+                parts.append(current)
+                current = ""
+            parts.append(line[:max_length])
+            line = line[max_length:]
+        candidate = f"{current}\n{line}" if current else line
+        if len(candidate) > max_length:
+            parts.append(current)
+            current = line
+        else:
+            current = candidate
+    if current:
+        parts.append(current)
+    return parts
+
+def pack_sections(sections, max_length=MESSAGE_MAX_LENGTH, separator=SECTION_SEPARATOR):
+    """
+    Pack sections into as few messages as possible, each at most max_length
+    characters; sections are only cut when one alone is over the limit
+    A cut section is listed only with the message holding its last piece,
+    the one that completes it
+    Returns [(message, [section_index, ...])]
+    """
+    messages = []
+    current = ""
+    current_sections = []
+    for index, section in enumerate(sections):
+        pieces = [section] if len(section) <= max_length else split_text(section, max_length)
+        for piece in pieces:
+            candidate = f"{current}{separator}{piece}" if current else piece
+            if len(candidate) > max_length:
+                messages.append((current, current_sections))
+                current = piece
+                current_sections = []
+            else:
+                current = candidate
+        # The last piece is always in the current message
+        current_sections.append(index)
+    if current:
+        messages.append((current, current_sections))
+    return messages
+
+def split_message(sections, max_length=MESSAGE_MAX_LENGTH, separator=SECTION_SEPARATOR):
+    """Pack sections into messages of at most max_length characters"""
+    return [message for message, _ in pack_sections(sections, max_length, separator)]
+
+def build_digests(registry, sections, max_length=MESSAGE_MAX_LENGTH, already_sent=None):
+    """
+    Coalesce a day's reminders into one digest per recipient
+    sections is [(build_section, kd_survei_list, reminder)], build_section(kd_subset)
+    returning the text of one reminder
+    already_sent is a set of (reminder, kd_survei, phone) to leave out, with
+    kd_survei and phone as str (as SendHistory.sent_on returns them)
+    Returns [(message, [contact, ...], [(reminder, kd_survei), ...])]:
+    recipients with the same digest share an entry, so each distinct message
+    is planned once
+    """
+    already_sent = already_sent or set()
+    sections_by_phone = {}
+    for build_section, kd_survei_list, reminder in sections:
+        texts = {}
+        for kd_subset, contacts in registry.route_groups(kd_survei_list):
+            for contact in contacts:
+                phone = contact["phone"]
+                # The history keeps kd_survei and phone as text, the snapshot may not
+                remaining = tuple(kd for kd in kd_subset if (reminder, str(kd), str(phone)) not in already_sent)
+                if not remaining:
+                    continue
+                # Built once per distinct subset, shared by its subscribers
+                if remaining not in texts:
+                    texts[remaining] = build_section(list(remaining))
+                covers = [(reminder, kd) for kd in remaining]
+                sections_by_phone.setdefault(phone, []).append((texts[remaining], covers))
+    
+    digests = {}
+    for phone, phone_sections in sections_by_phone.items():
+        packed = pack_sections([text for text, _ in phone_sections], max_length)
+        for message, indexes in packed:
+            covers = tuple(pair for i in indexes for pair in phone_sections[i][1])
+            # The same text can carry different covers (a cut section's last piece or not)
+            digests.setdefault((message, covers), []).append(registry.contacts[phone])
+    
+    return [(message, contacts, list(covers)) for (message, covers), contacts in digests.items()]
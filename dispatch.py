@@ -0,0 +1,321 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Shared keep-alive session, created on first use
+_session = None
+_session_lock = threading.Lock()
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter
+    `rate` tokens are added per second, up to `capacity` tokens
+    """
+    
+    def __init__(self, rate, capacity=1):
+        if rate <= 0:
+            raise ValueError("rate must be greater than 0")
+        self.rate = float(rate)
+        self.capacity = max(1.0, float(capacity))
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self):
+        """Block until a token is available, then take it"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                
+                wait_time = (1 - self.tokens) / self.rate
+            
+            time.sleep(wait_time)
+
+class RetryableSendError(Exception):
+    """
+    A send that failed for a transient reason (5xx, 429, timeout, connection
+    error) and is worth retrying; retry_after is the server's hint in seconds
+    """
+    
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending while the circuit breaker has given up on the server"""
+
+class SendGuard:
+    """
+    Backpressure around a send function, shared by every dispatch worker
+
+    Transient failures (RetryableSendError) are retried up to max_retries times
+    with exponential backoff and jitter; the delay grows with the failures seen
+    by all workers, so they slow down together, and shrinks again on success.
+    After failure_threshold consecutive transient failures the circuit opens:
+    every worker pauses while health_check() is probed every probe_interval
+    seconds, and resumes once it passes. When the server stays down for
+    max_pause seconds the guard gives up and fails the remaining sends fast.
+    """
+    
+    def __init__(self, health_check=None, max_retries=3, base_delay=1.0, max_delay=30.0,
+                 failure_threshold=5, probe_interval=5.0, max_pause=300.0, seed=None):
+        self.health_check = health_check
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = max(1, failure_threshold)
+        self.probe_interval = probe_interval
+        self.max_pause = max_pause
+        self.random = random.Random(seed)
+        
+        self.failures = 0
+        self.is_open = False
+        self.gave_up = False
+        self.prober = None
+        self.lock = threading.Lock()
+        self.closed = threading.Condition(self.lock)
+    
+    def backoff_delay(self, retry_after=None):
+        """Delay before the next attempt: exponential in the failure count, with jitter"""
+        with self.lock:
+            failures = max(1, self.failures)
+            ceiling = min(self.max_delay, self.base_delay * 2 ** (failures - 1))
+            delay = ceiling / 2 + self.random.uniform(0, ceiling / 2)
+        if retry_after:
+            delay = max(delay, min(float(retry_after), self.max_delay))
+        return delay
+    
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+    
+    def record_failure(self):
+        """Count a transient failure; returns True when it opens the circuit"""
+        with self.lock:
+            self.failures += 1
+            if not self.is_open and self.failures >= self.failure_threshold:
+                self.is_open = True
+                return True
+            return False
+    
+    def is_healthy(self):
+        if self.health_check is None:
+            return True
+        try:
+            return bool(self.health_check())
+        except Exception:
+            return False
+    
+    def wait_until_closed(self):
+        """
+        Block while the circuit is open; one caller probes health_check and
+        the others wait for it. Returns False when the guard gave up
+        """
+        with self.lock:
+            if self.gave_up:
+                return False
+            if not self.is_open:
+                return True
+            if self.prober is not None:
+                # Another worker is probing, wait for its verdict
+                while self.is_open and not self.gave_up:
+                    self.closed.wait()
+                return not self.gave_up
+            self.prober = threading.current_thread()
+        
+        print(f"Circuit open: pausing dispatch until WPPConnect is healthy (up to {self.max_pause:.0f}s)")
+        deadline = time.monotonic() + self.max_pause
+        healthy = False
+        while True:
+            if self.is_healthy():
+                healthy = True
+                break
+            if time.monotonic() + self.probe_interval > deadline:
+                break
+            time.sleep(self.probe_interval)
+        
+        with self.lock:
+            self.prober = None
+            if healthy:
+                print("Circuit closed: WPPConnect is healthy again, resuming dispatch")
+                self.is_open = False
+                self.failures = 0
+            else:
+                print("Circuit still open: giving up on WPPConnect for this run")
+                self.gave_up = True
+            self.closed.notify_all()
+        return healthy
+    
+    def check_health(self):
+        """Check health before dispatching; opens the circuit (and waits) when unhealthy"""
+        if self.is_healthy():
+            return True
+        with self.lock:
+            self.is_open = True
+        return self.wait_until_closed()
+    
+    def call(self, func, *args):
+        """
+        Call func(*args) with retries, backoff and the circuit breaker
+        Raises CircuitOpenError when the guard gave up, or the last
+        RetryableSendError when every retry failed
+        """
+        attempt = 0
+        while True:
+            if not self.wait_until_closed():
+                raise CircuitOpenError("WPPConnect unavailable, send not attempted")
+            try:
+                value = func(*args)
+            except RetryableSendError as e:
+                self.record_failure()
+                if attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                delay = self.backoff_delay(e.retry_after)
+                print(f"WARNING: {e}, retrying in {delay:.1f}s (attempt {attempt}/{self.max_retries})")
+                time.sleep(delay)
+                continue
+            self.record_success()
+            return value
+
+def get_http_session(pool_size=10):
+    """Get the shared keep-alive HTTP session (connection pooled)"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            # Imported here so modules that only need the rate limiter stay light
+            import requests
+            from requests.adapters import HTTPAdapter
+            
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+def dispatch_messages(contacts, message, send_func, messages_per_second=1, max_workers=4, burst=1, on_result=None,
+                      guard=None):
+    """
+    Send the same message to every contact using a bounded worker pool
+    send_func(phone, message) must return True when the message was sent, and
+    may raise RetryableSendError for transient failures (retried through guard);
+    any other exception fails that contact only
+    on_result(contact, result), if given, is called from the worker as soon as a send finishes
+    Returns one result dict per contact, in the same order as contacts; a send
+    that failed because the server stayed unavailable has "retryable": True
+    """
+    if not contacts:
+        return []
+    
+    limiter = TokenBucket(messages_per_second, capacity=burst)
+    
+    def send_one(contact):
+        phone = contact["phone"]
+        name = contact["name"]
+        
+        def attempt():
+            limiter.acquire()
+            return send_func(phone, message)
+        
+        unavailable = False
+        try:
+            success = guard.call(attempt) if guard else attempt()
+        except (RetryableSendError, CircuitOpenError) as e:
+            print(f"ERROR: Failed to send message to {phone} - {str(e)}")
+            success = False
+            unavailable = True
+        except Exception as e:
+            # One bad send must not abort the other workers' results
+            print(f"ERROR: Failed to send message to {phone} - {type(e).__name__}: {str(e)}")
+            success = False
+        
+        if success:
+            print(f"Sending to {name} ({phone})... ✓ Sent")
+        else:
+            print(f"Sending to {name} ({phone})... ✗ Failed")
+        
+        result = {
+            "phone": phone,
+            "name": name,
+            "status": "Sent" if success else "Failed",
+            "message": message
+        }
+        if unavailable:
+            result["retryable"] = True
+        
+        if on_result:
+            on_result(contact, result)
+        
+        return result
+    
+    workers = max(1, min(max_workers, len(contacts)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(send_one, contacts))
+
+def dispatch_batches(items, send_batch_func, batch_size=50, messages_per_second=1, on_result=None, guard=None):
+    """
+    Send (contact, message) items in batches through a bulk endpoint
+    send_batch_func([(phone, message), ...], messages_per_second) must return
+    one bool per item, and may raise RetryableSendError when the whole batch
+    failed transiently
+    The rate is applied where the messages leave: the bulk endpoint spaces out
+    the batch's sends at messages_per_second
+    on_result(contact, result), if given, is called for every item of a finished batch
+    Returns one result dict per item, in the same order as items, marked
+    "retryable" like dispatch_messages results
+    """
+    if not items:
+        return []
+    
+    results = []
+    
+    for start in range(0, len(items), batch_size):
+        batch = items[start:start + batch_size]
+        
+        pairs = [(contact["phone"], message) for contact, message in batch]
+        unavailable = False
+        try:
+            if guard:
+                statuses = guard.call(send_batch_func, pairs, messages_per_second)
+            else:
+                statuses = send_batch_func(pairs, messages_per_second)
+        except (RetryableSendError, CircuitOpenError) as e:
+            print(f"ERROR: Failed to send batch of {len(batch)} messages - {str(e)}")
+            statuses = [False] * len(batch)
+            unavailable = True
+        except Exception as e:
+            print(f"ERROR: Failed to send batch of {len(batch)} messages - {type(e).__name__}: {str(e)}")
+            statuses = [False] * len(batch)
+        
+        for (contact, message), success in zip(batch, statuses):
+            phone = contact["phone"]
+            name = contact["name"]
+            
+            if success:
+                print(f"Sending to {name} ({phone})... ✓ Sent")
+            else:
+                print(f"Sending to {name} ({phone})... ✗ Failed")
+            
+            result = {
+                "phone": phone,
+                "name": name,
+                "status": "Sent" if success else "Failed",
+                "message": message
+            }
+            if unavailable and not success:
+                result["retryable"] = True
+            
+            if on_result:
+                on_result(contact, result)
+            
+            results.append(result)
+    
+    return results
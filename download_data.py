@@ -1,40 +1,83 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import NoSuchElementException, TimeoutException
-from dotenv import load_dotenv, dotenv_values
 import os
 import sys
 import time
+import re
 import json
-import gzip
-import pandas as pd
-import requests
+import threading
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlparse
 
-# Add parent directory to path to import send_whatsapp
+# Add parent directory to path to import the local modules
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-# Create result folder if it doesn't exist
-RESULT_FOLDER = "result"
-if not os.path.exists(RESULT_FOLDER):
-    os.makedirs(RESULT_FOLDER)
+from config import RESULT_FOLDER, WPPCONNECT_URL, ensure_result_folder
+from contacts import load_registry
+from dispatch import get_http_session
+import metrics
+from kegiatan_api import (
+    FETCH_WORKERS,
+    KEGIATAN_AKTIF_URL,
+    AuthExpiredError,
+    auth_session_path,
+    clear_auth_session,
+    extract_auth_headers,
+    get_pagination,
+    iter_pages,
+    load_auth_session,
+    save_auth_session,
+    stream_kegiatan_aktif,
+)
+from stream_decode import STREAM_BATCH_SIZE, iter_record_batches, looks_like_json
 
-# WPPConnect API endpoint for sending messages
-WPPCONNECT_URL = "http://localhost:21465/api/sendMessage"
+# selenium, pandas and the snapshot writers are imported where they are used,
+# so sending an error notification or a browserless run never pays for them
 
-# Import contacts from send_whatsapp
-from send_whatsapp import CONTACTS
+# Also write the snapshot as Excel (slow, only needed to open it by hand)
+EXPORT_EXCEL = False
 
-# Load environment variables from .env file
-load_dotenv()
-env_vars = dotenv_values(".env")
+# Call the API directly with the saved auth session, use the browser only when it expired
+BROWSERLESS_MODE = True
+
+# Reuse API responses fetched within response_cache.CACHE_TTL and revalidate
+# older ones through ETag/Last-Modified
+USE_RESPONSE_CACHE = True
+
+# Keep captured requests in memory and cap how many selenium-wire holds on to
+SELENIUMWIRE_OPTIONS = {
+    'request_storage': 'memory',
+    'request_storage_max_size': 100,
+}
+
+# Lean browser profile: headless Chrome, eager page loads, images off and
+# static assets (images, fonts, stylesheets) aborted at the selenium-wire proxy
+FAST_BROWSER = True
+
+# Static assets the lean profile never downloads
+BLOCKED_ASSET_PATTERN = r'.*\.(?:png|jpe?g|gif|svg|ico|webp|bmp|woff2?|ttf|otf|eot|css|map|mp4|webm)(?:\?.*)?$'
+
+# Seconds to wait for a login step or for the API response to be captured
+BROWSER_WAIT_TIMEOUT = 30
+
+# How often WebDriverWait checks the DOM (selenium's default is 0.5 seconds)
+WAIT_POLL_SECONDS = 0.1
+
+# Multi-account runs: browsers running at the same time (each one holds a Chrome
+# instance and a selenium-wire proxy in memory)
+MAX_BROWSERS = 2
+
+# selenium-wire proxy port of the first account, the next accounts use the
+# following ports (None lets selenium-wire pick free ports)
+PROXY_BASE_PORT = 12000
+
+# Column tagging each snapshot row with the account it was collected with
+ACCOUNT_COLUMN = "account"
 
 def send_error_notification(error_message):
     """Send error notification to admin contacts"""
     try:
         # Filter admin contacts
-        admin_contacts = [c for c in CONTACTS if c.get("type") == "admin"]
+        admin_contacts = load_registry().admins()
         
         if not admin_contacts:
             print("No admin contacts to notify")
@@ -54,7 +97,7 @@ def send_error_notification(error_message):
                     "phone": phone,
                     "message": message
                 }
-                response = requests.post(WPPCONNECT_URL, json=payload, timeout=5)
+                response = get_http_session().post(WPPCONNECT_URL, json=payload, timeout=5)
                 if response.status_code == 200:
                     print(f"✓ Notified {name} ({phone})")
                 else:
@@ -68,30 +111,57 @@ def send_error_notification(error_message):
     except Exception as e:
         print(f"Error sending notification: {str(e)}")
 
-def getCredentialsFromEnv():
-    """Get username and password from .env file"""
-    username = env_vars.get('username')
-    password = env_vars.get('password')
+def getCredentialsFromEnv(account=None):
+    """
+    Get username and password from .env file
+    For a named account the keys are <account>_username and <account>_password
+    """
+    from dotenv import load_dotenv, dotenv_values
+    
+    # Load environment variables from .env file
+    load_dotenv()
+    env_vars = dotenv_values(".env")
+    
+    prefix = f"{account}_" if account else ""
+    username = env_vars.get(prefix + 'username')
+    password = env_vars.get(prefix + 'password')
     if not username or not password:
-        print("ERROR: username or password not found in .env file!")
+        print(f"ERROR: {prefix}username or {prefix}password not found in .env file!")
         return None, None
     return username, password
 
-def fillAndSubmitLoginForm(driver):
-    """Fill the login form and submit it"""
+def getAccountsFromEnv():
+    """
+    Get the account names listed in .env as accounts=satker1,satker2
+    Returns an empty list when only the single username/password account is set
+    """
+    try:
+        from dotenv import dotenv_values
+    except ImportError:
+        return []
+    
+    accounts = dotenv_values(".env").get('accounts') or os.environ.get('accounts') or ""
+    return [account.strip() for account in accounts.split(",") if account.strip()]
+
+def fillAndSubmitLoginForm(driver, account=None):
+    """Fill the login form with the account's credentials and submit it"""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import NoSuchElementException, TimeoutException
+    
     try:
         # Wait for the login form to appear
-        wait = WebDriverWait(driver, 10)
-        wait.until(EC.presence_of_element_located((By.XPATH, "/html/body/div/div[2]/div/div/div/div/form/div[1]/input")))
+        wait = WebDriverWait(driver, 10, poll_frequency=WAIT_POLL_SECONDS)
+        username_field = wait.until(EC.presence_of_element_located((By.XPATH, "/html/body/div/div[2]/div/div/div/div/form/div[1]/input")))
         print("Login form loaded!")
         
         # Get credentials from .env
-        username, password = getCredentialsFromEnv()
+        username, password = getCredentialsFromEnv(account)
         if not username or not password:
             return False
         
         # Fill username field
-        username_field = driver.find_element(By.XPATH, "/html/body/div/div[2]/div/div/div/div/form/div[1]/input")
         username_field.clear()
         username_field.send_keys(username)
         print(f"Username filled: {username}")
@@ -119,20 +189,31 @@ def fillAndSubmitLoginForm(driver):
         return False
 
 def clickLoginSsoButton(driver):
-    """Click the login SSO button"""
+    """Click the login SSO button as soon as it is clickable"""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import TimeoutException
+    
     try:
-        button = driver.find_element(By.XPATH, "/html/body/div/div[1]/div/div/div/div/span/form/div/div[4]/button")
+        wait = WebDriverWait(driver, BROWSER_WAIT_TIMEOUT, poll_frequency=WAIT_POLL_SECONDS)
+        button = wait.until(EC.element_to_be_clickable((By.XPATH, "/html/body/div/div[1]/div/div/div/div/span/form/div/div[4]/button")))
         button.click()
         print("Button clicked!")
-    except NoSuchElementException:
+    except TimeoutException:
         print("ERROR: Button with the specified XPath not found!")
     except Exception as e:
         print(f"ERROR: Failed to click button - {str(e)}")
 
 def waitForPageLoadAfterLogin(driver):
     """Wait for the page to load successfully after login"""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import TimeoutException
+    
     try:
-        wait = WebDriverWait(driver, 10)
+        wait = WebDriverWait(driver, 10, poll_frequency=WAIT_POLL_SECONDS)
         wait.until(EC.presence_of_element_located((By.XPATH, "/html/body/div/div[1]/div[1]/div[1]/div[1]/div/h1/a/img")))
         print("Page loaded successfully!")
         return True
@@ -143,53 +224,133 @@ def waitForPageLoadAfterLogin(driver):
         print(f"ERROR: Failed to wait for page load - {str(e)}")
         return False
 
-def captureNetworkRequest(driver, target_url):
-    """Capture network requests matching the target URL"""
+def buildCapturedResponse(request, response):
+    """
+    Turn one intercepted request/response pair into a captured data dict
+    The body is kept as it came (possibly gzip-compressed) and only decoded
+    later, in batches, by readPagedFrame
+    """
+    print(f"Request URL: {request.url}")
+    print(f"Request Method: {request.method}")
+    
+    if response is None:
+        print("ERROR: Response is None")
+        return None
+    
+    print(f"Response Status: {response.status_code}")
+    
+    captured = {
+        'url': request.url,
+        'method': request.method,
+        'headers': dict(request.headers),
+        'response': None,
+        'body': response.body
+    }
+    
+    try:
+        if not looks_like_json(response.body):
+            print("ERROR: Failed to parse JSON - response body is not a JSON object")
+            return None
+    except zlib.error as e:
+        print(f"ERROR: Failed to decompress gzip - {str(e)}")
+        return None
+    
+    return captured
+
+def startNetworkCapture(driver, target_url, on_response=None, captured_event=None):
+    """
+    Capture responses of the target URL at the proxy as soon as they arrive
+    Only the target API host is in scope, so selenium-wire neither stores nor
+    buffers images, scripts and fonts from other hosts
+    captured_event (a threading.Event) is set on the first captured response
+    Returns the list that captured responses are appended to
+    """
+    captured_data = []
+    
+    if not hasattr(driver, 'response_interceptor'):
+        print("WARNING: selenium-wire not available, network capture disabled")
+        return captured_data
+    
+    # Restrict capture to the API host
+    driver.scopes = ['.*' + re.escape(urlparse(target_url).netloc) + '.*']
+    
+    def interceptor(request, response):
+        if target_url not in request.url:
+            return
+        try:
+            captured = buildCapturedResponse(request, response)
+            if captured is None:
+                return
+            captured_data.append(captured)
+            if captured_event is not None:
+                captured_event.set()
+            if on_response:
+                on_response(captured)
+        except Exception as e:
+            # Never break the proxy because of a capture error
+            print(f"ERROR: Failed to handle captured response - {str(e)}")
+    
+    driver.response_interceptor = interceptor
+    return captured_data
+
+def blockStaticAssets(driver):
+    """
+    Abort requests for images, fonts and stylesheets at the selenium-wire proxy
+    Asset URLs are added to the proxy scopes so the interceptor sees them,
+    the rest of the page traffic stays out of scope
+    """
+    if not hasattr(driver, 'request_interceptor'):
+        return
+    
+    blocked = re.compile(BLOCKED_ASSET_PATTERN, re.IGNORECASE)
+    driver.scopes = list(driver.scopes or []) + [BLOCKED_ASSET_PATTERN]
+    
+    def interceptor(request):
+        if blocked.match(request.url):
+            metrics.inc("blocked_assets_total")
+            request.abort()
+    
+    driver.request_interceptor = interceptor
+
+def waitForCapture(driver, captured_event, timeout=BROWSER_WAIT_TIMEOUT):
+    """
+    Wait until the API response has been captured, returning right away
+    instead of after a fixed delay
+    Without selenium-wire there is nothing to wait on, so wait for the
+    page after login instead
+    """
+    if not hasattr(driver, 'response_interceptor'):
+        return waitForPageLoadAfterLogin(driver)
+    
+    if captured_event.wait(timeout):
+        print("API response captured!")
+        return True
+    print(f"ERROR: API response was not captured within {timeout} seconds!")
+    return False
+
+def captureNetworkRequest(driver, target_url, captured_data=None):
+    """
+    Capture network requests matching the target URL
+    Uses the responses collected by startNetworkCapture when given, otherwise
+    walks the driver's request history
+    """
     try:
-        matched_requests = []
+        if captured_data:
+            matched_requests = list(captured_data)
+        else:
+            matched_requests = []
+            
+            # Get all requests from the driver's request history
+            # This requires selenium-wire to intercept network traffic
+            for request in driver.requests:
+                if target_url in request.url:
+                    captured = buildCapturedResponse(request, request.response)
+                    if captured is not None:
+                        matched_requests.append(captured)
         
-        # Get all requests from the driver's request history
-        # This requires selenium-wire to intercept network traffic
-        for request in driver.requests:
-            if target_url in request.url:
-                print(f"Request URL: {request.url}")
-                print(f"Request Method: {request.method}")
-                
-                # Try to get response body if available
-                try:
-                    if request.response is None:
-                        print("ERROR: Response is None")
-                        continue
-                    
-                    print(f"Response Status: {request.response.status_code}")
-                    
-                    response_body = request.response.body
-                    
-                    # Check if the response is gzip-compressed
-                    if response_body.startswith(b'\x1f\x8b'):
-                        response_text = gzip.decompress(response_body).decode('utf-8')
-                    elif isinstance(response_body, bytes):
-                        response_text = response_body.decode('utf-8')
-                    else:
-                        response_text = str(response_body)
-                    
-                    response_data = json.loads(response_text)
-                    matched_requests.append({
-                        'url': request.url,
-                        'method': request.method,
-                        'response': response_data
-                    })
-                except json.JSONDecodeError as e:
-                    print(f"ERROR: Failed to parse JSON - {str(e)}")
-                except gzip.BadGzipFile as e:
-                    print(f"ERROR: Failed to decompress gzip - {str(e)}")
-                except Exception as e:
-                    print(f"ERROR: Could not parse response body - {str(e)}")
-                    matched_requests.append({
-                        'url': request.url,
-                        'method': request.method,
-                        'response': None
-                    })
+        # Drop stored request bodies so proxy memory stays flat
+        if hasattr(driver, 'response_interceptor'):
+            del driver.requests
         
         if matched_requests:
             print(f"\nCaptured {len(matched_requests)} request(s) matching {target_url}")
@@ -205,110 +366,491 @@ def captureNetworkRequest(driver, target_url):
         print(f"ERROR: Failed to capture network requests - {str(e)}")
         return []
 
-def saveResponseToExcel(captured_data, filename="api_response.xlsx"):
-    """Save the captured API response data to an Excel file"""
+def frameFromRecords(records):
+    """DataFrame of a list of records, with the tgl_* columns already as dates"""
+    import pandas as pd
+    from snapshot import normalize_dates
+    
+    return normalize_dates(pd.DataFrame(records))
+
+def readStreamedFrames(captured):
+    """
+    Decode a captured raw body in batches of STREAM_BATCH_SIZE records
+    Fills captured['response'] with the rest of the response (pagination
+    metadata and an empty record list)
+    Returns the list of DataFrames, one per batch
+    """
+    envelope = {}
+    frames = []
+    with metrics.span("json_decode"):
+        for records in iter_record_batches(captured['body'], STREAM_BATCH_SIZE, envelope):
+            frames.append(frameFromRecords(records))
+    captured['response'] = envelope
+    return frames
+
+def readPagedFrame(captured, cache=None):
+    """
+    Build a DataFrame from a captured response and, when the API paginates,
+    from every other page fetched concurrently with the same auth headers
+    A raw body is decoded in batches, so only one batch of records is held
+    as Python objects at a time
+    Pages are merged one by one, in page order
+    """
+    import pandas as pd
+    
+    streamed = None
+    if captured.get('body') is not None:
+        streamed = readStreamedFrames(captured)
+        if 'data' not in captured['response']:
+            print(f"ERROR: 'data' key not found in response. Available keys: {list(captured['response'].keys())}")
+            return None
+    
+    response = captured['response']
+    pagination = get_pagination(response)
+    if pagination:
+        print(f"Response is paginated (page {pagination[0]} of {pagination[1]}), fetching remaining pages...")
+    
+    session_data = {'headers': extract_auth_headers(captured.get('headers') or {})}
+    pages = iter_pages(
+        session_data,
+        response,
+        captured['url'],
+        http=get_http_session(),
+        workers=FETCH_WORKERS,
+        cache=cache
+    )
+    
+    current_page = pagination[0] if pagination else 1
+    frames = []
+    with metrics.span("page_fetch"):
+        for page, records in enumerate(pages, start=1):
+            metrics.inc("api_pages_total")
+            if page == current_page and streamed is not None:
+                frames.extend(streamed)
+            elif records:
+                frames.append(frameFromRecords(records))
+    
+    if not frames:
+        return None
+    return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+def readCapturedFrame(captured_data, cache=None):
+    """
+    Convert the captured API response data (every page of it) to a DataFrame
+    Returns None when there is nothing valid to save
+    """
     try:
         if not captured_data:
             print("ERROR: captured_data is empty")
-            return False
+            return None
         
-        if not captured_data[0].get('response'):
+        # Use the first captured response carrying data
+        captured = next((data for data in captured_data if data.get('response') or data.get('body') is not None), None)
+        if captured is None:
             print("ERROR: No valid response data to save")
-            return False
+            return None
         
-        # Extract the response
-        response = captured_data[0]['response']
-        
-        # Check if 'data' key exists
-        if 'data' not in response:
+        # Check if 'data' key exists (a raw body is checked while it is decoded)
+        response = captured['response']
+        if captured.get('body') is None and 'data' not in response:
             print(f"ERROR: 'data' key not found in response. Available keys: {list(response.keys())}")
-            return False
+            return None
         
-        data_list = response['data']
+        # Convert every page to one DataFrame
+        df = readPagedFrame(captured, cache)
         
-        if not data_list:
+        if df is None:
             print("ERROR: data_list is empty")
-            return False
+            return None
+        return df
+        
+    except Exception as e:
+        print(f"ERROR: Failed to read captured data - {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+def saveFrameToSnapshot(df, name="api_response"):
+    """Delta-sync a DataFrame into the snapshot file"""
+    try:
+        from snapshot import export_excel
+        from delta_sync import has_changes, sync_snapshot
         
-        # Convert to DataFrame
-        df = pd.DataFrame(data_list)
+        # Delta-sync against the previous snapshot in result folder
+        with metrics.span("snapshot_write"):
+            delta = sync_snapshot(df, name, RESULT_FOLDER)
+        if not has_changes(delta):
+            print("Snapshot unchanged, nothing to update")
+            return True
         
-        # Save to Excel in result folder
-        filepath = os.path.join(RESULT_FOLDER, filename)
-        df.to_excel(filepath, index=False, sheet_name='Data')
-        print(f"Data saved to {filepath} successfully!")
+        print(
+            f"Data saved to {RESULT_FOLDER} successfully! "
+            f"({len(delta['added'])} added, {len(delta['changed'])} changed, {len(delta['removed'])} removed rows)"
+        )
+        
+        # Optional Excel export
+        if EXPORT_EXCEL:
+            with metrics.span("excel_export"):
+                filepath = export_excel(df, name, RESULT_FOLDER)
+            print(f"Data exported to {filepath}")
         return True
         
     except Exception as e:
-        print(f"ERROR: Failed to save to Excel - {str(e)}")
+        print(f"ERROR: Failed to save snapshot - {str(e)}")
         import traceback
         traceback.print_exc()
         return False
 
-# Create a Chrome driver instance
-# Note: Make sure you have ChromeDriver installed and in your PATH
-# Download from: https://chromedriver.chromium.org/
-# For network request capture, this uses selenium-wire
-# Install with: pip install selenium-wire
-try:
-    from seleniumwire import webdriver as wire_webdriver
-    driver = wire_webdriver.Chrome()
-except ImportError:
-    print("WARNING: selenium-wire not installed. Using regular webdriver without request capture.")
-    print("Install with: pip install selenium-wire")
-    driver = webdriver.Chrome()
-
-# Maximize the window
-driver.maximize_window()
-
-try:
-    # Open a website
-    url = "https://manajemen-mitra.bps.go.id/launcher"
-    print(f"Opening {url}...")
-    driver.get(url)
-    
-    # Wait for the page to load
-    time.sleep(3)
-    
-
-    # Click the login SSO button
-    clickLoginSsoButton(driver)
-    
-    # Fill and submit the login form
-    fillAndSubmitLoginForm(driver)
-    
-    # Wait for the page to load successfully after login
-    waitForPageLoadAfterLogin(driver)
-    
-    # Capture network requests matching the API endpoint
-    api_url = "https://mitra-api.bps.go.id/api/dashboard/kegiatan-aktif"
-    captured_data = captureNetworkRequest(driver, api_url)
-    
-    # Print the captured response data
-    if captured_data:
-        print("\n" + "="*80)
-        print("CAPTURED API RESPONSE")
-        print("="*80)
-        for idx, data in enumerate(captured_data):
-            print(f"\nRequest #{idx + 1}:")
-            print(f"URL: {data['url']}")
-            if data['response']:
-                print(f"Response:\n{json.dumps(data['response'], indent=2)}")
-            else:
-                print("Response: Could not parse response data")
-        print("="*80 + "\n")
+def saveResponseToSnapshot(captured_data, name="api_response"):
+    """Save the captured API response data (every page of it) to a snapshot file"""
+    df = readCapturedFrame(captured_data)
+    if df is None:
+        return False
+    return saveFrameToSnapshot(df, name)
+
+def saveAuthSession(captured_data, account=None):
+    """Persist the auth headers of a captured API request for browserless runs"""
+    for data in captured_data:
+        if (data.get('response') or data.get('body') is not None) and data.get('headers'):
+            try:
+                if save_auth_session(data['headers'], auth_session_path(account)):
+                    print("Auth session saved for browserless runs")
+                    return True
+            except Exception as e:
+                print(f"WARNING: Failed to save auth session - {str(e)}")
+                return False
+    print("WARNING: No auth headers found in captured requests")
+    return False
+
+def getResponseCache(account=None):
+    """Response cache of an account, or None when caching is disabled"""
+    if not USE_RESPONSE_CACHE:
+        return None
+    from response_cache import ResponseCache
+    
+    return ResponseCache(account)
+
+def cacheCapturedData(captured_data, api_url, cache):
+    """
+    Cache the captured API responses
+    The response the snapshot is built from is stored under api_url, the key
+    later runs look up, whatever query string the dashboard added to it
+    """
+    primary = next((data for data in captured_data if data.get('response') or data.get('body') is not None), None)
+    for data in captured_data:
+        url = api_url if data is primary else data['url']
+        if data.get('body') is not None:
+            cache.put_body(url, data['body'], source_url=data['url'])
+        elif data.get('response'):
+            cache.put(url, data['response'], source_url=data['url'])
+
+def readCachedFrame(api_url, account=None, cache=None):
+    """
+    Build the DataFrame from a fresh cached response, without network or browser
+    Returns None when there is no fresh cached response
+    """
+    if cache is None:
+        return None
+    entry = cache.get_fresh(api_url)
+    if entry is None:
+        return None
+    
+    # Pages missing from the cache are fetched with the saved session
+    try:
+        headers = load_auth_session(auth_session_path(account))['headers']
+    except Exception:
+        headers = {}
+    
+    print(f"Using cached response of {api_url} ({int(cache.age(entry))}s old)")
+    metrics.inc("api_cache_hits_total")
+    # Other pages are looked up from the url the response was fetched from
+    source_url = entry.get('url') or api_url
+    if cache.has_body(api_url, entry):
+        # Streamed from the cached raw body
+        return readCapturedFrame([{
+            'url': source_url,
+            'method': 'GET',
+            'headers': headers,
+            'response': None,
+            'body': cache.body_path(api_url)
+        }], cache)
+    return readCapturedFrame([{
+        'url': api_url,
+        'method': 'GET',
+        'headers': headers,
+        'response': entry['response']
+    }], cache)
+
+def fetchWithSavedSession(api_url, account=None, cache=None):
+    """
+    Fetch the API directly with the account's saved auth session (no browser)
+    The body is not read yet: readCapturedFrame decodes it in batches as it
+    streams in
+    Returns captured data in the same shape as captureNetworkRequest, or None if the session expired
+    """
+    try:
+        session_data = load_auth_session(auth_session_path(account))
+        body = stream_kegiatan_aktif(session_data, api_url, http=get_http_session(), cache=cache)
+        print(f"Fetched {api_url} with saved auth session")
+        return [{
+            'url': api_url,
+            'method': 'GET',
+            'headers': session_data['headers'],
+            'response': None,
+            'body': body
+        }]
+    except AuthExpiredError as e:
+        print(f"Saved auth session not usable ({str(e)}), falling back to browser login")
+        clear_auth_session(auth_session_path(account))
+        return None
+    except Exception as e:
+        print(f"WARNING: Browserless fetch failed ({str(e)}), falling back to browser login")
+        return None
+
+def printCapturedData(captured_data):
+    """Print a summary of the captured responses (the records themselves can be huge)"""
+    print("\n" + "="*80)
+    print("CAPTURED API RESPONSE")
+    print("="*80)
+    for idx, data in enumerate(captured_data):
+        print(f"\nRequest #{idx + 1}:")
+        print(f"URL: {data['url']}")
+        if isinstance(data.get('body'), (bytes, bytearray)):
+            print(f"Body: {len(data['body'])} bytes")
+        if data['response']:
+            # Records are left out once the body has been decoded
+            print(f"Response:\n{json.dumps(data['response'], indent=2)}")
+        elif data.get('body') is None:
+            print("Response: Could not parse response data")
+    print("="*80 + "\n")
+
+def createDriver(proxy_port=None):
+    """
+    Create a Chrome driver instance, its selenium-wire proxy on proxy_port if given
+    Note: Make sure you have ChromeDriver installed and in your PATH
+    Download from: https://chromedriver.chromium.org/
+    For network request capture, this uses selenium-wire
+    Install with: pip install selenium-wire
+    """
+    from selenium.webdriver.chrome.options import Options
+    
+    chrome_options = Options()
+    if FAST_BROWSER:
+        chrome_options.add_argument("--headless=new")
+        chrome_options.add_argument("--window-size=1280,800")
+        chrome_options.add_argument("--disable-extensions")
+        chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+        chrome_options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+        # driver.get returns at DOMContentLoaded, the explicit waits cover the rest
+        chrome_options.page_load_strategy = "eager"
+    
+    try:
+        from seleniumwire import webdriver as wire_webdriver
+        options = dict(SELENIUMWIRE_OPTIONS)
+        if proxy_port:
+            options['port'] = proxy_port
+        driver = wire_webdriver.Chrome(options=chrome_options, seleniumwire_options=options)
+    except ImportError:
+        from selenium import webdriver
+        
+        print("WARNING: selenium-wire not installed. Using regular webdriver without request capture.")
+        print("Install with: pip install selenium-wire")
+        driver = webdriver.Chrome(options=chrome_options)
+    
+    if not FAST_BROWSER:
+        # Maximize the window
+        driver.maximize_window()
+    return driver
+
+def runBrowserFlow(api_url, account=None, proxy_port=None, cache=None):
+    """
+    Log in through the browser and capture the API response
+    Returns the captured data as a DataFrame, or None
+    """
+    df = None
+    with metrics.span("browser_startup"):
+        driver = createDriver(proxy_port)
+    
+    # Hand matching API responses over as soon as the proxy sees them
+    captured_event = threading.Event()
+    live_capture = startNetworkCapture(
+        driver,
+        api_url,
+        on_response=lambda data: print(f"Captured response from {data['url']}"),
+        captured_event=captured_event
+    )
+    if FAST_BROWSER:
+        blockStaticAssets(driver)
+    
+    try:
+        with metrics.span("sso_login"):
+            # Open a website
+            url = "https://manajemen-mitra.bps.go.id/launcher"
+            print(f"Opening {url}...")
+            driver.get(url)
+            
+            # Click the login SSO button once it is clickable
+            clickLoginSsoButton(driver)
+            
+            # Fill and submit the login form
+            fillAndSubmitLoginForm(driver, account)
+        
+        # Wait until the dashboard has requested the API, not for the whole page
+        with metrics.span("wait_for_capture"):
+            waitForCapture(driver, captured_event)
+        
+        # Capture network requests matching the API endpoint
+        with metrics.span("capture"):
+            captured_data = captureNetworkRequest(driver, api_url, live_capture)
+        
+        if captured_data:
+            printCapturedData(captured_data)
+            
+            # Cache the captured responses for reruns within the TTL
+            if cache is not None:
+                cacheCapturedData(captured_data, api_url, cache)
+            
+            # Convert the response data (every page) to a DataFrame
+            df = readCapturedFrame(captured_data, cache)
+            
+            # Remember the auth session so the next run can skip the browser
+            saveAuthSession(captured_data, account)
+        
+        if not FAST_BROWSER:
+            # Keep the visible browser open for 5 seconds before closing
+            time.sleep(5)
+        
+    except Exception as error:
+        print(f"\n✗ FATAL ERROR: {str(error)}")
+        metrics.inc("download_errors_total")
+        send_error_notification(f"{account}: {error}" if account else str(error))
+        
+    finally:
+        # Close the browser
+        with metrics.span("browser_quit"):
+            driver.quit()
+        print("Browser closed.")
+    
+    return df
+
+def collectAccount(api_url=KEGIATAN_AKTIF_URL, account=None, proxy_port=None):
+    """
+    Collect kegiatan-aktif with one account
+    Returns a DataFrame, or None when nothing could be collected
+    """
+    # A response fetched within the TTL skips network and browser entirely
+    cache = getResponseCache(account)
+    df = readCachedFrame(api_url, account, cache)
+    if df is not None:
+        return df
+    
+    # Try the direct API call next, it skips browser startup and SSO login
+    if BROWSERLESS_MODE:
+        with metrics.span("api_fetch"):
+            captured_data = fetchWithSavedSession(api_url, account, cache)
+        if captured_data:
+            df = readCapturedFrame(captured_data, cache)
+            if df is not None:
+                return df
+    
+    return runBrowserFlow(api_url, account, proxy_port, cache)
+
+def collectAccountWorker(task):
+    """
+    Worker process entry point: collect one account in its own browser
+    Returns (account, DataFrame or None, metrics collected for the account)
+    """
+    account, proxy_port, api_url = task
+    # Workers are reused across accounts and may be forked with the parent's metrics
+    metrics.reset()
+    print(f"[{account}] Collecting kegiatan-aktif (proxy port {proxy_port or 'auto'})...")
+    try:
+        df = collectAccount(api_url, account, proxy_port)
+    except Exception as e:
+        # One account failing (e.g. Chrome not starting) must not stop the others
+        print(f"ERROR: [{account}] Collection failed - {str(e)}")
+        df = None
+    return account, df, metrics.snapshot() if metrics.METRICS_ENABLED else None
+
+def mergeAccountFrames(frames, failed_accounts, name="api_response"):
+    """
+    Merge per-account DataFrames into one, tagged with ACCOUNT_COLUMN
+    Rows of failed accounts are kept from the previous snapshot, so a failed
+    login doesn't delete them
+    """
+    import pandas as pd
+    
+    tagged = [df.assign(**{ACCOUNT_COLUMN: account}) for account, df in frames]
+    
+    if failed_accounts:
+        from snapshot import find_snapshot, load_snapshot
         
-        # Save the response data to Excel
-        saveResponseToExcel(captured_data)
+        if find_snapshot(name, RESULT_FOLDER)[0]:
+            previous = load_snapshot(name, RESULT_FOLDER)
+            if ACCOUNT_COLUMN in previous.columns:
+                kept = previous[previous[ACCOUNT_COLUMN].isin(failed_accounts)]
+                if not kept.empty:
+                    print(f"Keeping {len(kept)} previous rows of {', '.join(failed_accounts)}")
+                    tagged.append(kept)
     
-    # Keep the browser open for 5 seconds before closing
-    time.sleep(5)
+    return pd.concat(tagged, ignore_index=True)
+
+def downloadAccounts(accounts, api_url=KEGIATAN_AKTIF_URL, max_browsers=None):
+    """
+    Collect several accounts in parallel, one worker process per account,
+    at most max_browsers at a time, and merge them into one snapshot
+    Returns True when the snapshot was saved
+    """
+    max_browsers = max(1, min(max_browsers or MAX_BROWSERS, len(accounts)))
+    tasks = [
+        (account, PROXY_BASE_PORT + i if PROXY_BASE_PORT else None, api_url)
+        for i, account in enumerate(accounts)
+    ]
     
-except Exception as error:
-    print(f"\n✗ FATAL ERROR: {str(error)}")
-    send_error_notification(str(error))
+    print(f"Collecting {len(accounts)} account(s) with up to {max_browsers} browser(s)...")
+    frames = []
+    failed_accounts = []
+    with ProcessPoolExecutor(max_workers=max_browsers) as executor:
+        # map keeps the account order, so the merged snapshot is deterministic
+        for account, df, worker_metrics in executor.map(collectAccountWorker, tasks):
+            # Metrics recorded in the worker process are lost unless merged here
+            metrics.merge(worker_metrics)
+            if df is None:
+                print(f"✗ [{account}] No data collected")
+                failed_accounts.append(account)
+            else:
+                print(f"✓ [{account}] {len(df)} rows")
+                frames.append((account, df))
     
-finally:
-    # Close the browser
-    driver.quit()
-    print("Browser closed.")
+    if not frames:
+        print("ERROR: No account returned data")
+        return False
+    
+    return saveFrameToSnapshot(mergeAccountFrames(frames, failed_accounts))
+
+def downloadSnapshot(api_url=KEGIATAN_AKTIF_URL):
+    """
+    Download kegiatan-aktif into the snapshot
+    With accounts listed in .env every account is collected and merged
+    Returns True when the snapshot was saved
+    """
+    accounts = getAccountsFromEnv()
+    if accounts:
+        return downloadAccounts(accounts, api_url)
+    
+    df = collectAccount(api_url)
+    if df is None:
+        return False
+    return saveFrameToSnapshot(df)
+
+def main():
+    """Main function"""
+    ensure_result_folder()
+    try:
+        with metrics.span("total"):
+            downloadSnapshot()
+    finally:
+        metrics.write_metrics("download")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+import base64
+import json
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# kegiatan-aktif endpoint of the dashboard API
+KEGIATAN_AKTIF_URL = "https://mitra-api.bps.go.id/api/dashboard/kegiatan-aktif"
+
+# Where the auth session captured from the browser is persisted
+AUTH_SESSION_FILE = os.path.join("result", "auth_session.json")
+
+# Request headers replayed on direct API calls
+AUTH_HEADERS = ["authorization", "cookie", "x-xsrf-token", "accept", "origin", "referer", "user-agent"]
+
+# Treat a token as expired this many seconds before its real expiry
+EXPIRY_MARGIN = 60
+
+# Query parameter selecting a page of a paginated response
+PAGE_PARAM = "page"
+
+# Pages fetched concurrently when the response is paginated
+FETCH_WORKERS = 4
+
+def auth_session_path(account=None):
+    """Auth session file of an account (AUTH_SESSION_FILE for the default account)"""
+    if not account:
+        return AUTH_SESSION_FILE
+    root, ext = os.path.splitext(AUTH_SESSION_FILE)
+    return f"{root}_{account}{ext}"
+
+class AuthExpiredError(Exception):
+    """Raised when the saved auth session is missing, expired or rejected"""
+
+def get_token_expiry(authorization):
+    """
+    Read the `exp` claim from a Bearer JWT
+    Returns a unix timestamp, or None if the token is not a JWT
+    """
+    if not authorization or not authorization.lower().startswith("bearer "):
+        return None
+    try:
+        payload = authorization.split(" ", 1)[1].split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+        return claims.get("exp")
+    except Exception:
+        return None
+
+def extract_auth_headers(headers):
+    """Keep only the request headers needed to replay an API call"""
+    return {key: value for key, value in dict(headers).items() if key.lower() in AUTH_HEADERS}
+
+def save_auth_session(headers, path=AUTH_SESSION_FILE):
+    """Persist the auth headers captured from a logged-in browser request"""
+    headers = extract_auth_headers(headers)
+    authorization = next((v for k, v in headers.items() if k.lower() == "authorization"), None)
+    if not authorization and not any(k.lower() == "cookie" for k in headers):
+        return False
+    
+    session_data = {
+        "headers": headers,
+        "expires_at": get_token_expiry(authorization),
+        "saved_at": time.time(),
+    }
+    
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    # The headers are credentials: readable by the owner only
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(session_data, f)
+    os.replace(tmp_path, path)
+    return True
+
+def load_auth_session(path=AUTH_SESSION_FILE):
+    """
+    Load the persisted auth session
+    Raises AuthExpiredError if there is none or the token has expired
+    """
+    if not os.path.exists(path):
+        raise AuthExpiredError("No saved auth session")
+    
+    with open(path, "r", encoding="utf-8") as f:
+        session_data = json.load(f)
+    
+    expires_at = session_data.get("expires_at")
+    if expires_at and expires_at - EXPIRY_MARGIN <= time.time():
+        raise AuthExpiredError("Saved auth token has expired")
+    
+    return session_data
+
+def clear_auth_session(path=AUTH_SESSION_FILE):
+    """Forget the persisted auth session"""
+    if os.path.exists(path):
+        os.remove(path)
+
+def fetch_kegiatan_aktif(session_data, url=KEGIATAN_AKTIF_URL, http=None, timeout=30, cache=None):
+    """
+    Call the kegiatan-aktif API directly with a saved auth session
+    With a ResponseCache, a fresh cached response is returned without a
+    request and a stale one is revalidated through its ETag/Last-Modified
+    Returns the decoded JSON response
+    """
+    entry = cache.get(url) if cache is not None else None
+    if entry is not None and cache.is_fresh(entry):
+        return entry["response"]
+    
+    if http is None:
+        import requests
+        http = requests
+    
+    headers = dict(session_data["headers"])
+    if entry is not None:
+        headers.update(cache.validators(entry))
+    response = http.get(url, headers=headers, timeout=timeout)
+    
+    if response.status_code in (401, 403, 419):
+        raise AuthExpiredError(f"API rejected saved session ({response.status_code})")
+    
+    if response.status_code == 304 and entry is not None:
+        return cache.touch(url, entry)["response"]
+    
+    response.raise_for_status()
+    data = response.json()
+    if cache is not None:
+        cache.put(url, data, response.headers)
+    return data
+
+def stream_kegiatan_aktif(session_data, url=KEGIATAN_AKTIF_URL, http=None, timeout=30, cache=None,
+                          chunk_size=64 * 1024):
+    """
+    Call the kegiatan-aktif API without decoding the response
+    Returns the body for stream_decode: the cached body file when the cache
+    entry is fresh or the API answers 304, otherwise the response chunks,
+    copied into the cache as they are read
+    """
+    entry = cache.get(url) if cache is not None else None
+    if entry is not None and not cache.has_body(url, entry):
+        # Decoded entries are not revalidated here, they can't be streamed
+        entry = None
+    if entry is not None and cache.is_fresh(entry):
+        return cache.body_path(url)
+    
+    if http is None:
+        import requests
+        http = requests
+    
+    headers = dict(session_data["headers"])
+    if entry is not None:
+        headers.update(cache.validators(entry))
+    response = http.get(url, headers=headers, timeout=timeout, stream=True)
+    
+    if response.status_code in (401, 403, 419):
+        response.close()
+        raise AuthExpiredError(f"API rejected saved session ({response.status_code})")
+    
+    if response.status_code == 304 and entry is not None:
+        response.close()
+        cache.touch(url, entry)
+        return cache.body_path(url)
+    
+    if response.status_code >= 400:
+        response.close()
+    response.raise_for_status()
+    
+    def chunks():
+        try:
+            yield from response.iter_content(chunk_size)
+        finally:
+            response.close()
+    
+    if cache is not None:
+        return cache.tee_body(url, chunks(), response.headers)
+    return chunks()
+
+def get_pagination(response):
+    """
+    Read pagination metadata from a response
+    Understands Laravel paginators at the top level, under "meta" or
+    "pagination", or nested in "data"
+    Returns (current_page, last_page), or None if the response is not paginated
+    """
+    if not isinstance(response, dict):
+        return None
+    
+    data = response.get("data")
+    for meta in (response, response.get("meta"), response.get("pagination"), data):
+        if not isinstance(meta, dict):
+            continue
+        
+        current_page = meta.get("current_page")
+        last_page = meta.get("last_page")
+        if last_page is None and meta.get("total") is not None and meta.get("per_page"):
+            last_page = math.ceil(int(meta["total"]) / int(meta["per_page"]))
+        
+        if current_page is not None and last_page is not None:
+            return int(current_page), max(int(last_page), 1)
+    return None
+
+def get_records(response):
+    """Records of one response page, or None if it has no data list"""
+    if not isinstance(response, dict):
+        return None
+    data = response.get("data")
+    if isinstance(data, dict):
+        # Paginator nested in "data"
+        data = data.get("data")
+    return data if isinstance(data, list) else None
+
+def page_url(url, page):
+    """The url with its page query parameter set to `page`"""
+    parts = urlsplit(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != PAGE_PARAM]
+    query.append((PAGE_PARAM, str(page)))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+def iter_pages(session_data, first_response, url=KEGIATAN_AKTIF_URL, http=None, workers=FETCH_WORKERS, timeout=30,
+               cache=None):
+    """
+    Yield the record list of every page in page order
+    `first_response` is a page already fetched from `url`; when it carries
+    pagination metadata the other pages are fetched with a pool of `workers`
+    threads, keeping at most 2 * workers pages in flight
+    Raises when a page cannot be fetched, so a partial list is never saved
+    """
+    pagination = get_pagination(first_response)
+    if pagination is None:
+        yield get_records(first_response) or []
+        return
+    
+    current_page, last_page = pagination
+    pages = [page for page in range(1, last_page + 1) if page != current_page]
+    if not pages:
+        yield get_records(first_response) or []
+        return
+    
+    def fetch(page):
+        return get_records(fetch_kegiatan_aktif(session_data, page_url(url, page), http, timeout, cache)) or []
+    
+    window = max(1, workers) * 2
+    pending = deque()
+    remaining = iter(pages)
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(pages)))) as executor:
+        try:
+            for page in range(1, last_page + 1):
+                if page == current_page:
+                    yield get_records(first_response) or []
+                    continue
+                
+                # Keep the window of in-flight pages full
+                while len(pending) < window:
+                    next_page = next(remaining, None)
+                    if next_page is None:
+                        break
+                    pending.append(executor.submit(fetch, next_page))
+                
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
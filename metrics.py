@@ -0,0 +1,180 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# Metrics are only collected when METRICS_ENABLED=1 is set in the environment
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "").lower() in ("1", "true", "yes")
+
+# "prometheus" (textfile collector format) or "json"
+METRICS_FORMAT = os.environ.get("METRICS_FORMAT", "prometheus")
+
+# Folder the per-job metrics files are written to
+METRICS_FOLDER = os.environ.get("METRICS_FOLDER", os.path.join("result", "metrics"))
+
+# Histogram bucket upper bounds, in seconds
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+METRIC_PREFIX = "reminder_"
+
+_NULL_SPAN = nullcontext()
+_lock = threading.Lock()
+_spans = {}
+_counters = {}
+_histograms = {}
+
+def enable(enabled=True):
+    """Turn collection on or off at runtime"""
+    global METRICS_ENABLED
+    METRICS_ENABLED = enabled
+
+def reset():
+    """Forget everything collected so far"""
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+        _histograms.clear()
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+@contextmanager
+def _timed_span(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        with _lock:
+            _spans[name] = _spans.get(name, 0.0) + elapsed
+
+def span(name):
+    """Time a pipeline stage: `with span("snapshot_write"): ...`"""
+    if not METRICS_ENABLED:
+        return _NULL_SPAN
+    return _timed_span(name)
+
+def inc(name, value=1, **labels):
+    """Increase a counter"""
+    if not METRICS_ENABLED:
+        return
+    key = (name, _label_key(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+def observe(name, value, buckets=DEFAULT_BUCKETS):
+    """Record one value in a histogram"""
+    if not METRICS_ENABLED:
+        return
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = {"buckets": list(buckets), "counts": [0] * len(buckets), "sum": 0.0, "count": 0}
+            _histograms[name] = histogram
+        for i, bound in enumerate(histogram["buckets"]):
+            if value <= bound:
+                histogram["counts"][i] += 1
+        histogram["sum"] += value
+        histogram["count"] += 1
+
+def snapshot():
+    """Collected metrics as a plain dict"""
+    with _lock:
+        return {
+            "spans": dict(_spans),
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in _counters.items()
+            ],
+            "histograms": {name: dict(h, counts=list(h["counts"])) for name, h in _histograms.items()},
+        }
+
+def merge(data):
+    """
+    Add metrics collected elsewhere (a snapshot() from a worker process)
+    Spans and counters are summed, histograms with the same buckets added up
+    """
+    if not METRICS_ENABLED or not data:
+        return
+    with _lock:
+        for name, seconds in data["spans"].items():
+            _spans[name] = _spans.get(name, 0.0) + seconds
+        for counter in data["counters"]:
+            key = (counter["name"], _label_key(counter["labels"]))
+            _counters[key] = _counters.get(key, 0) + counter["value"]
+        for name, other in data["histograms"].items():
+            histogram = _histograms.get(name)
+            if histogram is None:
+                _histograms[name] = dict(other, counts=list(other["counts"]))
+                continue
+            if histogram["buckets"] != list(other["buckets"]):
+                print(f"WARNING: Histogram {name} has different buckets, not merged")
+                continue
+            histogram["counts"] = [a + b for a, b in zip(histogram["counts"], other["counts"])]
+            histogram["sum"] += other["sum"]
+            histogram["count"] += other["count"]
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "}"
+
+def to_prometheus(data, job):
+    """Render collected metrics in the Prometheus text exposition format"""
+    lines = []
+    
+    lines.append(f"# TYPE {METRIC_PREFIX}stage_duration_seconds gauge")
+    for stage, seconds in sorted(data["spans"].items()):
+        lines.append(f'{METRIC_PREFIX}stage_duration_seconds{{job="{job}",stage="{stage}"}} {seconds:.6f}')
+    
+    for name in sorted({c["name"] for c in data["counters"]}):
+        lines.append(f"# TYPE {METRIC_PREFIX}{name} counter")
+        for counter in data["counters"]:
+            if counter["name"] == name:
+                labels = dict(job=job, **counter["labels"])
+                lines.append(f"{METRIC_PREFIX}{name}{_format_labels(labels)} {counter['value']}")
+    
+    for name, histogram in sorted(data["histograms"].items()):
+        lines.append(f"# TYPE {METRIC_PREFIX}{name} histogram")
+        for bound, count in zip(histogram["buckets"], histogram["counts"]):
+            lines.append(f'{METRIC_PREFIX}{name}_bucket{{job="{job}",le="{bound}"}} {count}')
+        lines.append(f'{METRIC_PREFIX}{name}_bucket{{job="{job}",le="+Inf"}} {histogram["count"]}')
+        lines.append(f'{METRIC_PREFIX}{name}_sum{{job="{job}"}} {histogram["sum"]:.6f}')
+        lines.append(f'{METRIC_PREFIX}{name}_count{{job="{job}"}} {histogram["count"]}')
+    
+    lines.append(f"# TYPE {METRIC_PREFIX}last_run_timestamp_seconds gauge")
+    lines.append(f'{METRIC_PREFIX}last_run_timestamp_seconds{{job="{job}"}} {time.time():.0f}')
+    return "\n".join(lines) + "\n"
+
+def write_metrics(job, folder=None, fmt=None):
+    """
+    Write the collected metrics of a run to <folder>/<job>.prom or .json
+    Does nothing when metrics are disabled
+    Returns the written path
+    """
+    if not METRICS_ENABLED:
+        return None
+    
+    folder = folder or METRICS_FOLDER
+    fmt = fmt or METRICS_FORMAT
+    data = snapshot()
+    
+    try:
+        os.makedirs(folder, exist_ok=True)
+        if fmt == "json":
+            filepath = os.path.join(folder, f"{job}.json")
+            content = json.dumps(dict(data, job=job, written_at=time.time()), indent=2)
+        else:
+            filepath = os.path.join(folder, f"{job}.prom")
+            content = to_prometheus(data, job)
+        
+        # Write atomically so a collector never reads a half-written file
+        tmp_path = filepath + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, filepath)
+        return filepath
+    except Exception as e:
+        print(f"WARNING: Failed to write metrics - {str(e)}")
+        return None
@@ -0,0 +1,128 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+# SQLite file holding the dispatch state of every message
+OUTBOX_FILE = os.path.join("result", "outbox.db")
+
+# Number of status updates buffered before a commit
+OUTBOX_BATCH_SIZE = 20
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    idempotency_key TEXT PRIMARY KEY,
+    send_date TEXT NOT NULL,
+    phone TEXT NOT NULL,
+    name TEXT,
+    message TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'Pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_date_status ON outbox (send_date, status);
+"""
+
+def make_idempotency_key(message, phone, send_date):
+    """Stable key of one (message, contact, date) send"""
+    raw = f"{send_date}\x1f{phone}\x1f{message}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class Outbox:
+    """
+    Durable outbox of WhatsApp sends (SQLite in WAL mode)
+    Every send is enqueued before dispatch, so a restarted run only sends
+    what is still pending or failed
+    """
+    
+    def __init__(self, path=OUTBOX_FILE, batch_size=OUTBOX_BATCH_SIZE):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.lock = threading.Lock()
+        self.buffer = []
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+    
+    def enqueue(self, contacts, message, send_date):
+        """
+        Register one send per contact (existing keys are left untouched)
+        Returns {phone: idempotency_key}
+        """
+        now = time.time()
+        keys = {}
+        rows = []
+        for contact in contacts:
+            key = make_idempotency_key(message, contact["phone"], send_date)
+            keys[contact["phone"]] = key
+            rows.append((key, str(send_date), contact["phone"], contact.get("name"), message, now, now))
+        
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO outbox "
+                "(idempotency_key, send_date, phone, name, message, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self.conn.commit()
+        return keys
+    
+    def sent_keys(self, keys):
+        """Subset of keys that were already sent successfully"""
+        keys = list(keys)
+        sent = set()
+        with self.lock:
+            # Stay below SQLite's bound parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                cursor = self.conn.execute(
+                    f"SELECT idempotency_key FROM outbox WHERE status = 'Sent' AND idempotency_key IN ({placeholders})",
+                    chunk
+                )
+                sent.update(row[0] for row in cursor)
+        return sent
+    
+    def record(self, key, status):
+        """Buffer the outcome of a send, committing every batch_size updates"""
+        with self.lock:
+            self.buffer.append((status, time.time(), key))
+            if len(self.buffer) >= self.batch_size:
+                self._flush_locked()
+    
+    def flush(self):
+        """Commit all buffered outcomes"""
+        with self.lock:
+            self._flush_locked()
+    
+    def _flush_locked(self):
+        if not self.buffer:
+            return
+        self.conn.executemany(
+            "UPDATE outbox SET status = ?, attempts = attempts + 1, updated_at = ? WHERE idempotency_key = ?",
+            self.buffer
+        )
+        self.conn.commit()
+        self.buffer = []
+    
+    def pending(self, send_date=None):
+        """Rows that still have to be sent (pending or failed)"""
+        query = "SELECT idempotency_key, send_date, phone, name, message, status, attempts FROM outbox WHERE status != 'Sent'"
+        params = []
+        if send_date is not None:
+            query += " AND send_date = ?"
+            params.append(str(send_date))
+        with self.lock:
+            cursor = self.conn.execute(query, params)
+            columns = [c[0] for c in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor]
+    
+    def close(self):
+        """Flush and close the database"""
+        self.flush()
+        with self.lock:
+            self.conn.close()
@@ -0,0 +1,155 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+# Columns the reminder rules read from a snapshot
+REMINDER_COLUMNS = ["kd_survei", "tgl_rek_mulai", "tgl_rek_selesai"]
+
+# date.toordinal() of 1970-01-01, to turn day numbers back into dates
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# Day number of a missing date (NaT); dates before 1970 are negative, not missing
+NAT_DAY = np.iinfo("int64").min
+
+def to_day_numbers(values):
+    """Dates (datetime-like Series or array) as int64 days since epoch, NaT as NAT_DAY"""
+    if not pd.api.types.is_datetime64_any_dtype(values):
+        values = pd.to_datetime(values, errors="coerce")
+    days = np.asarray(values, dtype="datetime64[ns]").astype("datetime64[D]")
+    numbers = days.view("int64").copy()
+    numbers[np.isnat(days)] = NAT_DAY
+    return numbers
+
+def day_number(value):
+    """A single date as int64 days since epoch"""
+    return int(np.datetime64(value, "D").astype("int64"))
+
+def from_day_numbers(numbers):
+    """int64 days since epoch back to datetime64[ns]"""
+    return np.asarray(numbers, dtype="int64").astype("datetime64[D]").astype("datetime64[ns]")
+
+def stable_day_order(days):
+    """Stable argsort of day numbers, using numpy's radix sort when the span fits in 16 bits"""
+    if len(days) == 0:
+        return np.empty(0, dtype="int64")
+    offsets = days - days.min()
+    if offsets.max() < 2 ** 16:
+        offsets = offsets.astype("uint16")
+    return np.argsort(offsets, kind="stable")
+
+def to_reminder_frame(df):
+    """
+    Lean typed frame for reminder matching: only REMINDER_COLUMNS, kd_survei
+    as a categorical and the dates as datetime64[ns] at midnight
+    """
+    columns = [c for c in REMINDER_COLUMNS if c in df.columns]
+    lean = df[columns].copy()
+    
+    if "kd_survei" in lean.columns and not isinstance(lean["kd_survei"].dtype, pd.CategoricalDtype):
+        lean["kd_survei"] = lean["kd_survei"].astype("category")
+    
+    for column in ("tgl_rek_mulai", "tgl_rek_selesai"):
+        if column in lean.columns:
+            dates = lean[column]
+            if not pd.api.types.is_datetime64_any_dtype(dates):
+                dates = pd.to_datetime(dates, errors="coerce")
+            lean[column] = dates.dt.normalize()
+    
+    return lean
+
+def load_reminder_frame(name="api_response", folder="result"):
+    """Load only the columns the reminder rules need from a snapshot, typed"""
+    from snapshot import find_snapshot, load_snapshot
+    
+    _, fmt = find_snapshot(name, folder)
+    # Excel has no column pruning by name before the header is read
+    columns = None if fmt == "xlsx" else REMINDER_COLUMNS
+    return to_reminder_frame(load_snapshot(name, folder, columns=columns))
+
+def build_date_index(df, column, key="kd_survei"):
+    """
+    Map each date of `column` to the unique `key` values on that date
+    Values keep the order in which they first appear in the DataFrame
+    Works on the day-number and category-code arrays, without per-row Python
+    """
+    if column not in df.columns or key not in df.columns:
+        return {}
+    
+    days = to_day_numbers(df[column])
+    keys = df[key]
+    if isinstance(keys.dtype, pd.CategoricalDtype):
+        codes = keys.cat.codes.to_numpy()
+        categories = keys.cat.categories
+    else:
+        codes, categories = pd.factorize(keys)
+    
+    rows = np.flatnonzero((days != NAT_DAY) & (codes >= 0))
+    if len(rows) == 0:
+        return {}
+    days = days[rows]
+    codes = codes[rows].astype("int64")
+    
+    # First row of every (date, key) pair, in row order (hash based, no sort)
+    first = ~pd.Series(days * len(categories) + codes).duplicated().to_numpy()
+    days = days[first]
+    codes = codes[first]
+    
+    # Group by date, keeping row order inside each date
+    order = stable_day_order(days)
+    days = days[order]
+    values = np.asarray(categories, dtype=object)[codes[order]].tolist()
+    starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+    ends = np.r_[starts[1:], len(days)]
+    
+    return {
+        date.fromordinal(int(days[start]) + EPOCH_ORDINAL): values[start:end]
+        for start, end in zip(starts, ends)
+    }
+
+class DateRangeIndex:
+    """
+    Rows of a snapshot sorted by one date column, for date range queries
+    A range costs two binary searches instead of a scan of every row
+    """
+    
+    def __init__(self, df, column):
+        if column in df.columns:
+            days = to_day_numbers(df[column])
+        else:
+            days = np.empty(0, dtype="int64")
+        missing = days == NAT_DAY
+        if missing.any():
+            # Rows without a date are left out
+            valid = np.flatnonzero(~missing)
+            order = valid[stable_day_order(days[valid])]
+        else:
+            order = stable_day_order(days)
+        self.rows = order
+        self.days = days[order]
+    
+    def rows_between(self, first, last):
+        """
+        Rows whose date is between first and last (day numbers, inclusive)
+        Returns (row positions, their day numbers), sorted by date then row
+        """
+        start = np.searchsorted(self.days, first, side="left")
+        end = np.searchsorted(self.days, last, side="right")
+        return self.rows[start:end], self.days[start:end]
+
+class ReminderIndex:
+    """
+    Date -> kd_survei lookups for every reminder rule, built once per snapshot
+    """
+    
+    def __init__(self, df):
+        self.starting = build_date_index(df, "tgl_rek_mulai")
+        self.ending = build_date_index(df, "tgl_rek_selesai")
+    
+    def starting_on(self, date):
+        """kd_survei whose recruitment starts on date"""
+        return self.starting.get(date, [])
+    
+    def ending_on(self, date):
+        """kd_survei whose recruitment ends on date"""
+        return self.ending.get(date, [])
@@ -0,0 +1,102 @@
+from datetime import timedelta
+
+import numpy as np
+import pandas as pd
+
+from reminder_index import DateRangeIndex, day_number, from_day_numbers
+
+# Columns of a reminder schedule table
+SCHEDULE_COLUMNS = ["date", "reminder_type", "days_to_go", "kd_survei", "target_date"]
+
+def compute_reminder_schedule(df, start_date, end_date, final_days, include_initial=True):
+    """
+    Every reminder due between start_date and end_date (inclusive) in one pass
+    Final reminders are due days_to_go days before tgl_rek_selesai, initial
+    reminders on tgl_rek_mulai
+    Each rule is one binary search over a DateRangeIndex, whatever the length
+    of the range
+    Returns a DataFrame with SCHEDULE_COLUMNS, one row per
+    (date, reminder_type, days_to_go, kd_survei)
+    """
+    start = day_number(start_date)
+    end = day_number(end_date)
+    has_key = df["kd_survei"].notna()
+    if not has_key.all():
+        # Rows without a kd_survei are never reminded by the daily index either
+        df = df[has_key]
+    # Only the matched rows' kd_survei are materialized
+    kd_survei = df["kd_survei"]
+    parts = []
+    
+    if include_initial and "tgl_rek_mulai" in df.columns:
+        rows, starts = DateRangeIndex(df, "tgl_rek_mulai").rows_between(start, end)
+        parts.append(pd.DataFrame({
+            "date": starts,
+            "reminder_type": "initial",
+            "days_to_go": 0,
+            "kd_survei": kd_survei.iloc[rows].to_numpy(),
+            "target_date": starts,
+            "_row": rows,
+            "_rule": 0,
+        }))
+    
+    if len(final_days) and "tgl_rek_selesai" in df.columns:
+        ending = DateRangeIndex(df, "tgl_rek_selesai")
+        for rule, days_to_go in enumerate(final_days, 1):
+            # Due date = end date - days_to_go, so the end dates are a shifted range
+            rows, ends = ending.rows_between(start + days_to_go, end + days_to_go)
+            parts.append(pd.DataFrame({
+                "date": ends - days_to_go,
+                "reminder_type": "final",
+                "days_to_go": days_to_go,
+                "kd_survei": kd_survei.iloc[rows].to_numpy(),
+                "target_date": ends,
+                "_row": rows,
+                "_rule": rule,
+            }))
+    
+    if not parts:
+        return pd.DataFrame(columns=SCHEDULE_COLUMNS)
+    
+    schedule = pd.concat(parts, ignore_index=True)
+    
+    # Same order as the daily run: by date, initial before finals in
+    # FINAL_REMINDER_DAYS order, kd_survei in order of first appearance
+    schedule = schedule.sort_values(["date", "_rule", "_row"], kind="stable")
+    schedule = schedule.drop_duplicates(["date", "reminder_type", "days_to_go", "kd_survei"])
+    
+    schedule["date"] = from_day_numbers(schedule["date"])
+    schedule["target_date"] = from_day_numbers(schedule["target_date"])
+    return schedule[SCHEDULE_COLUMNS].reset_index(drop=True)
+
+def compute_catch_up(df, last_processed, today, final_days, include_initial=True, max_days=None):
+    """
+    Reminders that came due after last_processed and before today, for a run
+    that follows missed days
+    The whole missed window is one compute_reminder_schedule call, so a gap of
+    several days costs about as much as a single day
+    Of several missed reminders for the same survey end, only the latest is
+    kept; final reminders whose survey already ended, or that today's run
+    sends anyway (same end date), are dropped
+    max_days caps how far back the window goes
+    Returns a DataFrame with SCHEDULE_COLUMNS
+    """
+    first = last_processed + timedelta(days=1)
+    last = today - timedelta(days=1)
+    if max_days is not None:
+        first = max(first, today - timedelta(days=max_days))
+    if first > last:
+        return pd.DataFrame(columns=SCHEDULE_COLUMNS)
+    
+    schedule = compute_reminder_schedule(df, first, last, final_days, include_initial)
+    if schedule.empty:
+        return schedule
+    
+    final = (schedule["reminder_type"] == "final").to_numpy()
+    days_left = (schedule["target_date"] - pd.Timestamp(today)).dt.days.to_numpy()
+    keep = ~final | ((days_left >= 0) & ~np.isin(days_left, list(final_days)))
+    schedule = schedule[keep]
+    
+    # The schedule is sorted by date, so the last duplicate is the latest reminder
+    schedule = schedule[~schedule.duplicated(["reminder_type", "kd_survei", "target_date"], keep="last")]
+    return schedule.reset_index(drop=True)
@@ -0,0 +1,182 @@
+import hashlib
+import json
+import os
+import time
+
+# Where cached API responses are kept
+CACHE_FOLDER = os.path.join("result", "cache")
+
+# Seconds a cached response is used without asking the API again
+CACHE_TTL = 15 * 60
+
+# Seconds a stale response is kept for revalidation before it is evicted
+CACHE_MAX_AGE = 2 * 24 * 60 * 60
+
+class ResponseCache:
+    """
+    On-disk cache of decoded API responses keyed by url and account
+    Entries younger than ttl are served without a request; older ones can be
+    revalidated with If-None-Match / If-Modified-Since when the API sent an
+    ETag or Last-Modified
+    Large responses are kept as their raw body next to the entry (see
+    put_body), to be decoded in batches by stream_decode
+    """
+    
+    def __init__(self, account=None, folder=None, ttl=None, max_age=None):
+        self.account = account or ""
+        self.folder = folder or CACHE_FOLDER
+        self.ttl = CACHE_TTL if ttl is None else ttl
+        self.max_age = max(self.ttl, CACHE_MAX_AGE if max_age is None else max_age)
+        self.pruned = False
+    
+    def path(self, url):
+        """Cache file of a url"""
+        key = hashlib.sha256(f"{self.account}\n{url}".encode("utf-8")).hexdigest()
+        return os.path.join(self.folder, key + ".json")
+    
+    def body_path(self, url):
+        """Raw body file of a url cached with put_body"""
+        return self.path(url)[:-len(".json")] + ".body"
+    
+    def has_body(self, url, entry):
+        """Check whether an entry was cached as a raw body and the body is still there"""
+        return entry is not None and bool(entry.get("body")) and os.path.exists(self.body_path(url))
+    
+    def get(self, url):
+        """Cached entry of a url (fresh or not), or None"""
+        path = self.path(url)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            # A broken cache file is just a miss
+            return None
+    
+    def age(self, entry):
+        """Seconds since the entry was fetched or last revalidated"""
+        return time.time() - entry.get("fetched_at", 0)
+    
+    def is_fresh(self, entry):
+        """Check whether an entry can be used without a request"""
+        return entry is not None and self.age(entry) < self.ttl
+    
+    def get_fresh(self, url):
+        """Cached entry of a url if it is still fresh, otherwise None"""
+        entry = self.get(url)
+        return entry if self.is_fresh(entry) else None
+    
+    def validators(self, entry):
+        """Conditional request headers for revalidating an entry"""
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+    
+    def put(self, url, response, headers=None, source_url=None):
+        """
+        Store a decoded response with the validators of its HTTP headers
+        source_url is the url it was fetched from, when it is cached under
+        another one
+        """
+        headers = headers or {}
+        entry = {
+            "url": source_url or url,
+            "account": self.account,
+            "fetched_at": time.time(),
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "response": response,
+        }
+        self._write(url, entry)
+        return entry
+    
+    def put_body(self, url, body, headers=None, source_url=None):
+        """Store a raw (possibly gzip-compressed) response body as it is"""
+        for _ in self.tee_body(url, [body], headers, source_url):
+            pass
+        return self.get(url)
+    
+    def tee_body(self, url, chunks, headers=None, source_url=None):
+        """
+        Yield the chunks of a response body while writing them to the cache
+        The entry is only stored once every chunk has been read, so an
+        interrupted download never leaves a truncated body behind
+        """
+        os.makedirs(self.folder, exist_ok=True)
+        path = self.body_path(url)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        complete = False
+        try:
+            with open(tmp_path, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    yield chunk
+            os.replace(tmp_path, path)
+            complete = True
+        finally:
+            if not complete and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        
+        headers = headers or {}
+        self._write(url, {
+            "url": source_url or url,
+            "account": self.account,
+            "fetched_at": time.time(),
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "body": True,
+            "response": None,
+        })
+    
+    def touch(self, url, entry):
+        """Mark an entry as fresh again after a 304 Not Modified"""
+        entry["fetched_at"] = time.time()
+        self._write(url, entry)
+        return entry
+    
+    def clear(self):
+        """Remove every cached response"""
+        if not os.path.isdir(self.folder):
+            return
+        for filename in os.listdir(self.folder):
+            if filename.endswith((".json", ".body", ".tmp")):
+                os.remove(os.path.join(self.folder, filename))
+    
+    def prune(self):
+        """
+        Evict the responses of every account not fetched or revalidated for
+        max_age seconds, and temporary files left by interrupted writes
+        Returns the number of files removed
+        """
+        self.pruned = True
+        if not os.path.isdir(self.folder):
+            return 0
+        cutoff = time.time() - self.max_age
+        removed = 0
+        for filename in os.listdir(self.folder):
+            if not filename.endswith((".json", ".body", ".tmp")):
+                continue
+            path = os.path.join(self.folder, filename)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                # Removed by another worker in the meantime
+                pass
+        return removed
+    
+    def _write(self, url, entry):
+        if not self.pruned:
+            # Once per cache, on its first write
+            self.prune()
+        os.makedirs(self.folder, exist_ok=True)
+        path = self.path(url)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
@@ -0,0 +1,225 @@
+# Append-only history of WhatsApp sends, one row per (send, reminder, kd_survei)
+#
+# Usage: python send_history.py [--kd KD] [--phone PHONE] [--since DATE]
+#            [--until DATE] [--status Sent] [--limit N] [--csv FILE]
+
+import argparse
+import csv
+import os
+import sqlite3
+import sys
+import threading
+import time
+from datetime import date
+
+# SQLite file holding every send outcome
+HISTORY_FILE = os.path.join("result", "send_history.db")
+
+# Number of rows buffered before a commit
+HISTORY_BATCH_SIZE = 200
+
+# Columns returned by queries, in display order
+HISTORY_COLUMNS = ["send_date", "reminder", "kd_survei", "phone", "name", "status", "sent_at"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    send_date TEXT NOT NULL,
+    reminder TEXT,
+    kd_survei TEXT,
+    phone TEXT NOT NULL,
+    name TEXT,
+    status TEXT NOT NULL,
+    sent_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_history_date ON history (send_date, status);
+CREATE INDEX IF NOT EXISTS idx_history_kd_phone ON history (kd_survei, phone, send_date);
+CREATE INDEX IF NOT EXISTS idx_history_phone ON history (phone, send_date);
+CREATE TABLE IF NOT EXISTS processed_days (
+    send_date TEXT PRIMARY KEY,
+    processed_at REAL NOT NULL
+);
+"""
+
+class SendHistory:
+    """
+    Append-only send history (SQLite in WAL mode), indexed by date,
+    kd_survei and phone
+    Rows are buffered and committed every batch_size appends
+    """
+    
+    def __init__(self, path=HISTORY_FILE, batch_size=HISTORY_BATCH_SIZE):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.batch_size = batch_size
+        self.lock = threading.Lock()
+        self.buffer = []
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+    
+    def append(self, send_date, contact, status, covers=()):
+        """
+        Buffer the outcome of one send
+        covers is [(reminder, kd_survei)] the message was about; a message
+        about no survey is stored as one row without kd_survei
+        """
+        now = time.time()
+        # kd_survei and phone are stored as text, whatever their type in the
+        # snapshot or the registry, so sent_on() matches them with str()
+        rows = [
+            (str(send_date), reminder, None if kd_survei is None else str(kd_survei), str(contact["phone"]),
+             contact.get("name"), status, now)
+            for reminder, kd_survei in (covers or [(None, None)])
+        ]
+        with self.lock:
+            self.buffer.extend(rows)
+            if len(self.buffer) >= self.batch_size:
+                self._flush_locked()
+    
+    def flush(self):
+        """Commit all buffered rows"""
+        with self.lock:
+            self._flush_locked()
+    
+    def _flush_locked(self):
+        if not self.buffer:
+            return
+        self.conn.executemany(
+            "INSERT INTO history (send_date, reminder, kd_survei, phone, name, status, sent_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            self.buffer
+        )
+        self.conn.commit()
+        self.buffer = []
+    
+    def sent_on(self, send_date):
+        """
+        Set of (reminder, kd_survei, phone) already sent successfully on
+        send_date, kd_survei and phone as str
+        """
+        self.flush()
+        with self.lock:
+            cursor = self.conn.execute(
+                "SELECT reminder, kd_survei, phone FROM history "
+                "WHERE send_date = ? AND status = 'Sent' AND kd_survei IS NOT NULL",
+                (str(send_date),)
+            )
+            return set(cursor)
+    
+    def sent_since(self, reminders, since):
+        """
+        Set of (reminder, kd_survei, phone) sent successfully on or after
+        since, for the given reminder labels only
+        """
+        reminders = sorted(set(reminders))
+        if not reminders:
+            return set()
+        self.flush()
+        placeholders = ", ".join("?" * len(reminders))
+        with self.lock:
+            cursor = self.conn.execute(
+                f"SELECT reminder, kd_survei, phone FROM history "
+                f"WHERE reminder IN ({placeholders}) AND send_date >= ? "
+                f"AND status = 'Sent' AND kd_survei IS NOT NULL",
+                (*reminders, str(since))
+            )
+            return set(cursor)
+    
+    def mark_processed(self, send_date):
+        """Record that every reminder due on send_date has been handled"""
+        self.flush()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO processed_days (send_date, processed_at) VALUES (?, ?)",
+                (str(send_date), time.time())
+            )
+            self.conn.commit()
+    
+    def last_processed(self):
+        """Latest date marked processed, or None"""
+        with self.lock:
+            row = self.conn.execute("SELECT MAX(send_date) FROM processed_days").fetchone()
+        return date.fromisoformat(row[0]) if row and row[0] else None
+    
+    def query(self, kd_survei=None, phone=None, since=None, until=None, status=None, limit=None):
+        """History rows matching every given filter, newest first"""
+        self.flush()
+        conditions = []
+        params = []
+        for column, operator, value in (
+            ("kd_survei", "=", kd_survei),
+            ("phone", "=", phone),
+            ("send_date", ">=", since),
+            ("send_date", "<=", until),
+            ("status", "=", status),
+        ):
+            if value is not None:
+                conditions.append(f"{column} {operator} ?")
+                params.append(str(value))
+        
+        query = f"SELECT {', '.join(HISTORY_COLUMNS)} FROM history"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY send_date DESC, id DESC"
+        if limit:
+            query += " LIMIT ?"
+            params.append(int(limit))
+        
+        with self.lock:
+            cursor = self.conn.execute(query, params)
+            return [dict(zip(HISTORY_COLUMNS, row)) for row in cursor]
+    
+    def close(self):
+        """Flush and close the database"""
+        self.flush()
+        with self.lock:
+            self.conn.close()
+
+def format_rows(rows):
+    """Format history rows as a plain text table"""
+    if not rows:
+        return "No matching sends"
+    rows = [dict(row, sent_at=time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(row["sent_at"]))) for row in rows]
+    widths = {c: max(len(c), *(len(str(row[c] or "")) for row in rows)) for c in HISTORY_COLUMNS}
+    lines = ["  ".join(c.ljust(widths[c]) for c in HISTORY_COLUMNS)]
+    lines.append("  ".join("-" * widths[c] for c in HISTORY_COLUMNS))
+    for row in rows:
+        lines.append("  ".join(str(row[c] or "").ljust(widths[c]) for c in HISTORY_COLUMNS))
+    return "\n".join(lines)
+
+def main():
+    """Query the send history from the command line"""
+    parser = argparse.ArgumentParser(description="Query the WhatsApp send history")
+    parser.add_argument("--kd", help="kd_survei")
+    parser.add_argument("--phone", help="recipient phone number")
+    parser.add_argument("--since", help="first send date (YYYY-MM-DD)")
+    parser.add_argument("--until", help="last send date (YYYY-MM-DD)")
+    parser.add_argument("--status", help="Sent or Failed")
+    parser.add_argument("--limit", type=int, default=100, help="maximum rows (0 for all)")
+    parser.add_argument("--csv", help="write the rows to this CSV file instead of printing them")
+    parser.add_argument("--db", default=HISTORY_FILE, help="history database")
+    args = parser.parse_args()
+    
+    if not os.path.exists(args.db):
+        print(f"No send history at {args.db}")
+        sys.exit(1)
+    
+    history = SendHistory(args.db)
+    try:
+        rows = history.query(args.kd, args.phone, args.since, args.until, args.status, args.limit or None)
+    finally:
+        history.close()
+    
+    if args.csv:
+        with open(args.csv, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=HISTORY_COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"{len(rows)} rows written to {args.csv}")
+    else:
+        print(format_rows(rows))
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,53 @@
-import pandas as pd
-import requests
-import time
+import argparse
 import os
 import sys
+import time
 from datetime import datetime, timedelta
 
-# Create result folder if it doesn't exist
-RESULT_FOLDER = "result"
-if not os.path.exists(RESULT_FOLDER):
-    os.makedirs(RESULT_FOLDER)
+from config import (
+    BACKOFF_BASE_DELAY,
+    BACKOFF_MAX_DELAY,
+    CATCH_UP_MAX_DAYS,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_MAX_PAUSE,
+    CIRCUIT_PROBE_INTERVAL,
+    DEBUG_DATE,
+    DIGEST_MODE,
+    DISPATCH_WORKERS,
+    ENABLE_INITIAL_REMINDER,
+    FINAL_REMINDER_DAYS,
+    MESSAGES_PER_SECOND,
+    RESULT_FOLDER,
+    SEND_BATCH_SIZE,
+    SEND_CONNECT_TIMEOUT,
+    SEND_MAX_RETRIES,
+    SEND_TIMEOUT,
+    USE_BATCH_ENDPOINT,
+    WPPCONNECT_BATCH_URL,
+    WPPCONNECT_HEALTH_URL,
+    WPPCONNECT_URL,
+    ensure_result_folder,
+)
+from dispatch import RetryableSendError, SendGuard, TokenBucket, dispatch_batches, dispatch_messages, get_http_session
+import metrics
+
+# pandas, the snapshot reader, the reminder index and the outbox are imported
+# where they are used, so importing this module stays cheap
+
+# Durable outbox, opened on first send
+_outbox = None
 
-# WPPConnect API endpoint
-WPPCONNECT_URL = "http://localhost:21465/api/sendMessage"
+# Contact registry, loaded on first send
+_registry = None
 
-# Hardcoded contacts
-CONTACTS = [
-    # {"phone": "6282379883130", "name": "Ali", "type": "user"},
-    {"phone": "6282236981385", "name": "Indra", "type": "admin"},
-    # {"phone": "6281331890887", "name": "Sani", "type": "admin"},
-]
+# Retry/circuit breaker state against WPPConnect, shared by a run's dispatches
+_send_guard = None
 
-# Debug mode: set to a specific date to test (e.g., "2024-01-15") or None for today
-DEBUG_DATE = "2025-01-01"
+# Append-only send history, opened on first send
+_history = None
 
-# Reminder settings
-ENABLE_INITIAL_REMINDER = False  # Enable/disable initial reminder (surveys starting today)
-FINAL_REMINDER_DAYS = [7, 3]  # Send reminder when 7 days or 3 days to go
+# Last (connected, total, down sessions) reported by /api/health
+_last_health = None
 
 def get_today_date():
     """
@@ -43,71 +65,373 @@ def get_today_date():
     
     return datetime.now().date()
 
-def read_excel_file(filename="api_response.xlsx"):
-    """Read the Excel file and return DataFrame"""
+def read_snapshot_file(name="api_response"):
+    """
+    Read the snapshot file and return a lean DataFrame: only the columns the
+    reminder rules need, kd_survei categorical and dates as datetime64
+    """
     try:
-        filepath = os.path.join(RESULT_FOLDER, filename)
-        df = pd.read_excel(filepath)
-        print(f"Excel file loaded: {len(df)} rows")
+        from reminder_index import load_reminder_frame
+        
+        df = load_reminder_frame(name, RESULT_FOLDER)
+        print(f"Snapshot loaded: {len(df)} rows")
         return df
     except Exception as e:
-        print(f"ERROR: Failed to read Excel file - {str(e)}")
+        print(f"ERROR: Failed to read snapshot file - {str(e)}")
         return None
 
+def retry_after_seconds(response):
+    """Retry-After header of a response in seconds, or None"""
+    try:
+        return float(response.headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+def check_transient_status(response, what):
+    """Raise RetryableSendError for 5xx and 429 answers"""
+    if response.status_code == 429 or response.status_code >= 500:
+        raise RetryableSendError(
+            f"{what} answered {response.status_code}",
+            retry_after=retry_after_seconds(response)
+        )
+
+def post_to_wppconnect(url, payload, timeout):
+    """
+    POST to WPPConnect, raising RetryableSendError when the request never
+    reached the server (connection refused, reset or connect timeout)
+    A read timeout or a body cut off mid-response is raised as it is: the
+    server may already have sent the messages, retrying would send them twice
+    """
+    import requests
+    
+    try:
+        return get_http_session().post(url, json=payload, timeout=(SEND_CONNECT_TIMEOUT, timeout))
+    except requests.ConnectionError as e:
+        # Includes ConnectTimeout, but not ReadTimeout
+        raise RetryableSendError(f"WPPConnect unreachable ({type(e).__name__})")
+
+def check_wppconnect_health():
+    """
+    Check that WPPConnect is up and at least one WhatsApp session connected
+    A server without /api/health (404) counts as healthy
+    """
+    global _last_health
+    try:
+        response = get_http_session().get(WPPCONNECT_HEALTH_URL, timeout=SEND_CONNECT_TIMEOUT)
+    except Exception:
+        return False
+    
+    try:
+        health = response.json() if response.status_code in (200, 503) else {}
+    except ValueError:
+        health = {}
+    sessions = health.get("sessions") if isinstance(health, dict) else None
+    if sessions:
+        # Report partial outages once, the server fails over to the connected sessions
+        down = sorted(s.get("session") for s in sessions if s.get("status") != "connected")
+        state = (len(sessions) - len(down), len(sessions), tuple(down))
+        if state != _last_health and down:
+            print(f"WARNING: {state[0]}/{state[1]} WhatsApp sessions connected, down: {', '.join(down)}")
+        _last_health = state
+    return response.status_code in (200, 404)
+
+def record_session(result):
+    """Count a send per WhatsApp session when the server says which one sent it"""
+    session = result.get("session") if isinstance(result, dict) else None
+    if not session:
+        return
+    metrics.inc("messages_by_session_total", session=session)
+    if result.get("failover"):
+        metrics.inc("session_failover_total", session=session)
+
+def make_send_guard():
+    """SendGuard with the configured retry, backoff and circuit breaker settings"""
+    return SendGuard(
+        health_check=check_wppconnect_health,
+        max_retries=SEND_MAX_RETRIES,
+        base_delay=BACKOFF_BASE_DELAY,
+        max_delay=BACKOFF_MAX_DELAY,
+        failure_threshold=CIRCUIT_FAILURE_THRESHOLD,
+        probe_interval=CIRCUIT_PROBE_INTERVAL,
+        max_pause=CIRCUIT_MAX_PAUSE
+    )
+
 def send_whatsapp_message(phone, message):
-    """Send WhatsApp message using WPPConnect"""
+    """
+    Send WhatsApp message using WPPConnect
+    Raises RetryableSendError for 5xx, 429 and connection errors; any other
+    failure, a read timeout included, returns False
+    """
     try:
         payload = {
             "phone": phone,
             "message": message
         }
-        response = requests.post(WPPCONNECT_URL, json=payload)
-        return response.status_code == 200
+        start = time.perf_counter()
+        response = post_to_wppconnect(WPPCONNECT_URL, payload, SEND_TIMEOUT)
+        metrics.observe("send_latency_seconds", time.perf_counter() - start)
+        check_transient_status(response, "WPPConnect")
+        if response.status_code != 200:
+            return False
+        try:
+            record_session(response.json())
+        except ValueError:
+            pass
+        return True
+    except RetryableSendError:
+        raise
     except Exception as e:
         print(f"ERROR: Failed to send message to {phone} - {str(e)}")
         return False
 
-def send_messages_to_contacts(message):
-    """Send message to all contacts"""
-    results = []
-    
-    print(f"\nSending messages to {len(CONTACTS)} contacts...")
-    print("=" * 80)
-    
-    for contact in CONTACTS:
-        phone = contact["phone"]
-        name = contact["name"]
+def send_whatsapp_batch(items, messages_per_second=MESSAGES_PER_SECOND):
+    """
+    Send several (phone, message) pairs with one WPPConnect batch request
+    The server spaces out the sends at messages_per_second
+    Returns one bool per item
+    Raises RetryableSendError when the whole batch failed transiently; any
+    other failure marks every item as failed
+    """
+    payload = {
+        "messages": [{"phone": phone, "message": message} for phone, message in items],
+        "ratePerSecond": messages_per_second
+    }
+    try:
+        # The server paces the batch and sends it with limited concurrency, allow it more time
+        start = time.perf_counter()
+        timeout = SEND_TIMEOUT + len(items) * (2 + 1 / messages_per_second)
+        response = post_to_wppconnect(WPPCONNECT_BATCH_URL, payload, timeout)
+        metrics.observe("batch_send_latency_seconds", time.perf_counter() - start)
         
-        print(f"Sending to {name} ({phone})...", end=" ")
+        if response.status_code == 404:
+            # Older server without the batch endpoint
+            print("WARNING: Batch endpoint not available, sending one by one")
+            limiter = TokenBucket(messages_per_second)
+            statuses = []
+            for phone, message in items:
+                limiter.acquire()
+                try:
+                    statuses.append(send_whatsapp_message(phone, message))
+                except RetryableSendError as e:
+                    print(f"ERROR: Failed to send message to {phone} - {str(e)}")
+                    statuses.append(False)
+            return statuses
         
-        success = send_whatsapp_message(phone, message)
+        check_transient_status(response, "WPPConnect batch")
         
-        if success:
-            print("✓ Sent")
-            results.append({
-                "phone": phone,
-                "name": name,
-                "status": "Sent",
-                "message": message
-            })
+        if response.status_code != 200:
+            print(f"ERROR: Batch send failed with status {response.status_code}")
+            return [False] * len(items)
+        
+        try:
+            results = response.json().get("results", [])
+        except ValueError:
+            print("ERROR: Batch response is not JSON")
+            return [False] * len(items)
+        
+        statuses = {}
+        for r in results:
+            statuses[r.get("index")] = bool(r.get("success"))
+            if r.get("success"):
+                record_session(r)
+        return [statuses.get(i, False) for i in range(len(items))]
+    except RetryableSendError:
+        raise
+    except Exception as e:
+        print(f"ERROR: Failed to send batch of {len(items)} messages - {str(e)}")
+        return [False] * len(items)
+
+def get_send_guard():
+    """Get the run's SendGuard, creating it on first use"""
+    global _send_guard
+    if _send_guard is None:
+        _send_guard = make_send_guard()
+    return _send_guard
+
+def reset_send_guard():
+    """Start the next run with a closed circuit"""
+    global _send_guard
+    _send_guard = None
+
+def get_outbox():
+    """Get the durable outbox, opening it on first use"""
+    global _outbox
+    if _outbox is None:
+        from outbox import Outbox
+        
+        _outbox = Outbox(os.path.join(ensure_result_folder(), "outbox.db"))
+    return _outbox
+
+def close_outbox():
+    """Flush pending outbox writes and close it"""
+    global _outbox
+    if _outbox is not None:
+        _outbox.close()
+        _outbox = None
+
+def get_history():
+    """Get the send history, opening it on first use"""
+    global _history
+    if _history is None:
+        from send_history import SendHistory
+        
+        _history = SendHistory(os.path.join(ensure_result_folder(), "send_history.db"))
+    return _history
+
+def close_history():
+    """Flush pending history rows and close it"""
+    global _history
+    if _history is not None:
+        _history.close()
+        _history = None
+
+def dispatch_with_outbox(contacts, message, send_date=None, covers=()):
+    """
+    Send message to contacts through the durable outbox
+    Contacts that already received this message on send_date are skipped
+    covers is [(reminder, kd_survei)] the message is about, for the send history
+    """
+    if send_date is None:
+        send_date = get_today_date()
+    
+    outbox = get_outbox()
+    history = get_history()
+    keys = outbox.enqueue(contacts, message, send_date)
+    already_sent = outbox.sent_keys(keys.values())
+    
+    pending_contacts = []
+    for contact in contacts:
+        if keys[contact["phone"]] in already_sent:
+            print(f"Skipping {contact['name']} ({contact['phone']})... already sent")
         else:
-            print("✗ Failed")
+            pending_contacts.append(contact)
+    
+    def record(contact, result):
+        outbox.record(keys[contact["phone"]], result["status"])
+        history.append(send_date, contact, result["status"], covers)
+        metrics.inc("messages_total", status=result["status"].lower())
+    
+    # Don't burn through the contacts while the WhatsApp session is down
+    guard = get_send_guard()
+    if pending_contacts:
+        guard.check_health()
+    
+    try:
+        with metrics.span("dispatch"):
+            if USE_BATCH_ENDPOINT:
+                sent_results = dispatch_batches(
+                    [(contact, message) for contact in pending_contacts],
+                    send_whatsapp_batch,
+                    batch_size=SEND_BATCH_SIZE,
+                    messages_per_second=MESSAGES_PER_SECOND,
+                    on_result=record,
+                    guard=guard
+                )
+            else:
+                sent_results = dispatch_messages(
+                    pending_contacts,
+                    message,
+                    send_whatsapp_message,
+                    messages_per_second=MESSAGES_PER_SECOND,
+                    max_workers=DISPATCH_WORKERS,
+                    on_result=record,
+                    guard=guard
+                )
+    finally:
+        outbox.flush()
+        history.flush()
+    
+    # Keep results in contact order, marking the skipped ones
+    sent_results = iter(sent_results)
+    results = []
+    for contact in contacts:
+        if keys[contact["phone"]] in already_sent:
             results.append({
-                "phone": phone,
-                "name": name,
-                "status": "Failed",
+                "phone": contact["phone"],
+                "name": contact["name"],
+                "status": "Skipped",
                 "message": message
             })
+        else:
+            results.append(next(sent_results))
+    
+    return results
+
+def get_registry():
+    """Get the contact registry, loading it on first use"""
+    global _registry
+    if _registry is None:
+        from contacts import load_registry
         
-        # Small delay between messages
-        time.sleep(1)
+        _registry = load_registry()
+    return _registry
+
+def send_messages_to_contacts(message, send_date=None):
+    """Send message to all contacts"""
+    contacts = list(get_registry().contacts.values())
+    
+    print(f"\nSending messages to {len(contacts)} contacts...")
+    print("=" * 80)
+    
+    results = dispatch_with_outbox(contacts, message, send_date)
     
     print("=" * 80)
     return results
 
-def get_initial_reminder_message(df):
+def send_to_subscribers(kd_survei_list, build_message, reminder=None):
+    """
+    Send every subscriber a message listing only the kd_survei it subscribed to
+    build_message(kd_survei_subset) returns the message text
+    reminder labels the sends in the history (e.g. "initial", "final_7")
+    """
+    routes = get_registry().route_groups(kd_survei_list)
+    
+    if not routes:
+        print("No subscribers for these surveys")
+        return []
+    
+    results = []
+    for kd_subset, contacts in routes:
+        message = build_message(kd_subset)
+        
+        print(f"\nSending to {len(contacts)} subscriber(s) of {len(kd_subset)} survei...")
+        print("=" * 80)
+        
+        results.extend(dispatch_with_outbox(contacts, message, covers=[(reminder, kd) for kd in kd_subset]))
+        
+        print("=" * 80)
+    
+    return results
+
+def build_initial_reminder_message(kd_survei_list):
+    """Initial reminder message listing kd_survei_list"""
+    message = "Hari ini sudah mulai rekrutmen untuk survei berikut:\n"
+    for idx, kd in enumerate(kd_survei_list, 1):
+        message += f"{idx}. {kd}\n"
+    
+    return message.strip()
+
+def build_late_initial_reminder_message(start_date, kd_survei_list):
+    """Initial reminder sent late, for kd_survei_list that started on start_date"""
+    message = f"Rekrutmen untuk survei berikut sudah dimulai sejak {start_date}:\n"
+    for idx, kd in enumerate(kd_survei_list, 1):
+        message += f"{idx}. {kd}\n"
+    
+    return message.strip()
+
+def build_final_reminder_message(target_date, days_to_go, kd_survei_list):
+    """Final reminder message for kd_survei_list ending on target_date"""
+    message = f"✅ Pengingat! ✅\nSurvei berikut akan selesai pada {target_date} ({days_to_go} hari lagi):\n"
+    for idx, kd in enumerate(kd_survei_list, 1):
+        message += f"{idx}. {kd}\n"
+    message += "\nJangan lupa melakukan penawaran kerja ke mitra ya 🫰🏻"
+    
+    return message.strip()
+
+def get_initial_reminder_message(df, index=None):
     """
     Get initial reminder message based on today's date matching tgl_rek_mulai
+    Pass a prebuilt ReminderIndex to avoid rebuilding it from df
     Returns the message and list of kd_survei
     """
     try:
@@ -115,37 +439,32 @@ def get_initial_reminder_message(df):
         today = get_today_date()
         print(f"Today's date: {today}")
         
-        # Filter rows where tgl_rek_mulai matches today
-        # Convert tgl_rek_mulai column to date format (remove time if present)
-        df['tgl_rek_mulai'] = pd.to_datetime(df['tgl_rek_mulai']).dt.date
+        if index is None:
+            from reminder_index import ReminderIndex
+            
+            index = ReminderIndex(df)
         
-        matching_rows = df[df['tgl_rek_mulai'] == today]
+        # Unique kd_survei whose tgl_rek_mulai matches today
+        kd_survei_list = index.starting_on(today)
         
-        if matching_rows.empty:
+        if not kd_survei_list:
             print("No reminders for today")
             return None, []
         
-        # Get unique kd_survei
-        kd_survei_list = matching_rows['kd_survei'].unique().tolist()
         print(f"Found {len(kd_survei_list)} unique kd_survei: {kd_survei_list}")
         
-        # Build message
-        message = "Hari ini sudah mulai rekrutmen untuk survei berikut:\n"
-        for idx, kd in enumerate(kd_survei_list, 1):
-            message += f"{idx}. {kd}\n"
-        
-        return message.strip(), kd_survei_list
+        return build_initial_reminder_message(kd_survei_list), kd_survei_list
     
     except Exception as e:
         print(f"ERROR: Failed to get initial reminder message - {str(e)}")
         return None, []
 
-def send_initial_reminder(df):
+def send_initial_reminder(df, index=None):
     """
     Send initial reminder message for surveys starting today
     """
     # Get initial reminder message based on today's date
-    message, kd_survei_list = get_initial_reminder_message(df)
+    message, kd_survei_list = get_initial_reminder_message(df, index)
     
     if message is None or not kd_survei_list:
         print("No initial reminders to send today")
@@ -153,57 +472,66 @@ def send_initial_reminder(df):
     
     print(f"\nInitial Reminder message:\n{message}\n")
     
-    # Send messages
-    results = send_messages_to_contacts(message)
+    # Send each subscriber the surveys it follows
+    results = send_to_subscribers(kd_survei_list, build_initial_reminder_message, "initial")
     
     return results
 
-def get_final_reminder_message(df):
+def get_final_reminders(df, index=None):
     """
-    Get final reminder message for surveys ending soon
-    Returns list of (message, kd_survei_list) tuples for each reminder day
+    Get the surveys ending soon
+    Returns list of (target_date, days_to_go, kd_survei_list) for each reminder day
     """
-    try:
-        today = get_today_date()
-        print(f"\nToday's date: {today}")
+    today = get_today_date()
+    print(f"\nToday's date: {today}")
+    
+    if index is None:
+        from reminder_index import ReminderIndex
         
-        # Convert tgl_rek_selesai column to date format
-        df['tgl_rek_selesai'] = pd.to_datetime(df['tgl_rek_selesai']).dt.date
+        index = ReminderIndex(df)
+    
+    reminders = []
+    
+    for days_to_go in FINAL_REMINDER_DAYS:
+        # Calculate the date that is days_to_go days away
+        target_date = today + timedelta(days=days_to_go)
         
-        reminders = []
+        # Unique kd_survei whose tgl_rek_selesai matches the target date
+        kd_survei_list = index.ending_on(target_date)
         
-        for days_to_go in FINAL_REMINDER_DAYS:
-            # Calculate the date that is days_to_go days away
-            target_date = today + timedelta(days=days_to_go)
-            
-            matching_rows = df[df['tgl_rek_selesai'] == target_date]
-            
-            if matching_rows.empty:
-                continue
-            
-            # Get unique kd_survei
-            kd_survei_list = matching_rows['kd_survei'].unique().tolist()
-            print(f"Found {len(kd_survei_list)} unique kd_survei ending in {days_to_go} days: {kd_survei_list}")
-            
-            # Build message
-            message = f"✅ Pengingat! ✅\nSurvei berikut akan selesai pada {target_date} ({days_to_go} hari lagi):\n"
-            for idx, kd in enumerate(kd_survei_list, 1):
-                message += f"{idx}. {kd}\n"
-            message += "\nJangan lupa melakukan penawaran kerja ke mitra ya 🫰🏻"
-            
-            reminders.append((message.strip(), kd_survei_list))
-            
-        return reminders
+        if not kd_survei_list:
+            continue
+        
+        print(f"Found {len(kd_survei_list)} unique kd_survei ending in {days_to_go} days: {kd_survei_list}")
+        reminders.append((target_date, days_to_go, kd_survei_list))
+    
+    return reminders
+
+def get_final_reminder_message(df, index=None):
+    """
+    Get final reminder message for surveys ending soon
+    Pass a prebuilt ReminderIndex to avoid rebuilding it from df
+    Returns list of (message, kd_survei_list) tuples for each reminder day
+    """
+    try:
+        return [
+            (build_final_reminder_message(target_date, days_to_go, kd_survei_list), kd_survei_list)
+            for target_date, days_to_go, kd_survei_list in get_final_reminders(df, index)
+        ]
     
     except Exception as e:
         print(f"ERROR: Failed to get final reminder message - {str(e)}")
         return []
 
-def send_final_reminder(df):
+def send_final_reminder(df, index=None):
     """
     Send final reminder messages for surveys ending soon
     """
-    reminders = get_final_reminder_message(df)
+    try:
+        reminders = get_final_reminders(df, index)
+    except Exception as e:
+        print(f"ERROR: Failed to get final reminder message - {str(e)}")
+        reminders = []
     
     if not reminders:
         print("No final reminders to send today")
@@ -211,108 +539,319 @@ def send_final_reminder(df):
     
     all_results = []
     
-    for message, kd_survei_list in reminders:
+    for target_date, days_to_go, kd_survei_list in reminders:
+        message = build_final_reminder_message(target_date, days_to_go, kd_survei_list)
         print(f"\nFinal Reminder message:\n{message}\n")
         
-        # Send messages
-        results = send_messages_to_contacts(message)
+        # Send each subscriber the surveys it follows
+        results = send_to_subscribers(
+            kd_survei_list,
+            lambda kd_subset: build_final_reminder_message(target_date, days_to_go, kd_subset),
+            f"final_{days_to_go}"
+        )
         all_results.extend(results)
     
     return all_results
 
-def send_no_reminder_notification():
+def plan_reminder_sections(df, index=None):
     """
-    Send notification to admin contacts when there are no reminders for today
+    Collect today's reminders as digest sections
+    Returns list of (build_section, kd_survei_list, reminder), build_section(kd_subset)
+    returning the reminder text for a subscriber's share of kd_survei_list
     """
+    if index is None:
+        from reminder_index import ReminderIndex
+        
+        index = ReminderIndex(df)
+    
+    sections = []
+    
+    if ENABLE_INITIAL_REMINDER:
+        kd_survei_list = index.starting_on(get_today_date())
+        if kd_survei_list:
+            print(f"Found {len(kd_survei_list)} unique kd_survei starting today: {kd_survei_list}")
+            sections.append((build_initial_reminder_message, kd_survei_list, "initial"))
+    
+    for target_date, days_to_go, kd_survei_list in get_final_reminders(df, index):
+        sections.append((
+            lambda kd_subset, target_date=target_date, days_to_go=days_to_go:
+                build_final_reminder_message(target_date, days_to_go, kd_subset),
+            kd_survei_list,
+            f"final_{days_to_go}"
+        ))
+    
+    return sections
+
+def plan_catch_up_sections(df, today=None):
+    """
+    Reminders that came due on days no run processed (server outage, failed
+    WhatsApp session), as digest sections labelled with their due date
+    (e.g. "final_7:2025-01-01")
+    Returns [] until a first processed day has been recorded
+    """
+    from reminder_schedule import compute_catch_up
+    
+    today = today or get_today_date()
+    last_processed = get_history().last_processed()
+    if last_processed is None or last_processed >= today - timedelta(days=1):
+        return []
+    
+    with metrics.span("catch_up_plan"):
+        schedule = compute_catch_up(
+            df, last_processed, today, FINAL_REMINDER_DAYS,
+            include_initial=ENABLE_INITIAL_REMINDER, max_days=CATCH_UP_MAX_DAYS
+        )
+    if schedule.empty:
+        return []
+    
+    print(f"\nFound {len(schedule)} reminder(s) missed since {last_processed}")
+    metrics.inc("catch_up_reminders_total", len(schedule))
+    
+    sections = []
+    groups = schedule.groupby(["date", "reminder_type", "days_to_go", "target_date"], sort=False)
+    for (due_date, reminder_type, days_to_go, target_date), rows in groups:
+        due_date = due_date.date()
+        target_date = target_date.date()
+        kd_survei_list = rows["kd_survei"].tolist()
+        if reminder_type == "initial":
+            build_section = lambda kd_subset, start_date=target_date: \
+                build_late_initial_reminder_message(start_date, kd_subset)
+            reminder = f"initial:{due_date}"
+        else:
+            # Tell the days actually left, not the ones at the missed due date
+            build_section = lambda kd_subset, target_date=target_date, days_left=(target_date - today).days: \
+                build_final_reminder_message(target_date, days_left, kd_subset)
+            reminder = f"final_{days_to_go}:{due_date}"
+        sections.append((build_section, kd_survei_list, reminder))
+    
+    return sections
+
+def catch_up_already_sent(sections):
+    """
+    (reminder, kd_survei, phone) of catch-up sections already sent: by the run
+    on their due date before it stopped (base label, e.g. "final_7"), or late
+    by an earlier catch-up run (full label, e.g. "final_7:2025-01-01")
+    """
+    labels_by_day = {}
+    for _, _, reminder in sections:
+        if reminder and ":" in reminder:
+            base, due_date = reminder.split(":", 1)
+            labels_by_day.setdefault(due_date, {})[base] = reminder
+    if not labels_by_day:
+        return set()
+    
+    history = get_history()
+    sent = set()
+    for due_date, labels in labels_by_day.items():
+        for base, kd_survei, phone in history.sent_on(due_date):
+            if base in labels:
+                sent.add((labels[base], kd_survei, phone))
+    
+    labels = [label for day_labels in labels_by_day.values() for label in day_labels.values()]
+    sent |= history.sent_since(labels, min(labels_by_day))
+    return sent
+
+def send_reminder_digests(sections):
+    """
+    Send each recipient one digest of all its reminders (split at MESSAGE_MAX_LENGTH)
+    Recipients with the same digest are dispatched together, and reminders the
+    send history shows as already sent today are left out
+    """
+    from digest import build_digests
+    
+    send_date = get_today_date()
+    with metrics.span("digest_plan"):
+        already_sent = get_history().sent_on(send_date) | catch_up_already_sent(sections)
+        digests = build_digests(get_registry(), sections, already_sent=already_sent)
+    
+    recipients = {contact["phone"] for _, contacts, _ in digests for contact in contacts}
+    print(
+        f"\nPlanned {sum(len(contacts) for _, contacts, _ in digests)} digest message(s) "
+        f"for {len(recipients)} recipient(s) covering {len(sections)} reminder(s)"
+    )
+    
     results = []
+    for message, contacts, covers in digests:
+        print(f"\nDigest for {len(contacts)} recipient(s):\n{message}\n")
+        print("=" * 80)
+        
+        results.extend(dispatch_with_outbox(contacts, message, send_date, covers))
+        
+        print("=" * 80)
     
+    return results
+
+def send_no_reminder_notification():
+    """
+    Send notification to admin contacts when there are no reminders for today
+    """
     # Filter admin contacts
-    admin_contacts = [c for c in CONTACTS if c.get("type") == "admin"]
+    admin_contacts = get_registry().admins()
     
     if not admin_contacts:
         print("No admin contacts to notify")
-        return results
+        return []
     
     message = "ℹ️ Info: Tidak ada pengingat survei untuk hari ini."
     
     print(f"\nNo reminders for today. Notifying {len(admin_contacts)} admin(s)...")
     print("=" * 80)
     
-    for contact in admin_contacts:
-        phone = contact["phone"]
-        name = contact["name"]
-        
-        print(f"Sending to {name} ({phone})...", end=" ")
-        
-        success = send_whatsapp_message(phone, message)
-        
-        if success:
-            print("✓ Sent")
-            results.append({
-                "phone": phone,
-                "name": name,
-                "status": "Sent",
-                "message": message
-            })
-        else:
-            print("✗ Failed")
-            results.append({
-                "phone": phone,
-                "name": name,
-                "status": "Failed",
-                "message": message
-            })
-        
-        time.sleep(1)
+    results = dispatch_with_outbox(admin_contacts, message)
     
     print("=" * 80)
     return results
 
-def save_results(results, filename="whatsapp_results.xlsx"):
-    """Save results to Excel file"""
-    try:
-        df = pd.DataFrame(results)
-        filepath = os.path.join(RESULT_FOLDER, filename)
-        df.to_excel(filepath, index=False, sheet_name='Results')
-        print(f"\nResults saved to {filepath}")
-    except Exception as e:
-        print(f"ERROR: Failed to save results - {str(e)}")
+def write_reminder_schedule(start_date, end_date, df=None, filename="reminder_schedule.csv"):
+    """
+    Compute every reminder due between start_date and end_date without sending
+    Writes one table of (date, reminder_type, days_to_go, kd_survei, target_date)
+    Returns the schedule DataFrame, or None if the snapshot could not be read
+    """
+    from reminder_schedule import compute_reminder_schedule
+    
+    if df is None:
+        df = read_snapshot_file()
+        if df is None:
+            return None
+    
+    with metrics.span("schedule"):
+        schedule = compute_reminder_schedule(
+            df, start_date, end_date, FINAL_REMINDER_DAYS, include_initial=ENABLE_INITIAL_REMINDER
+        )
+    
+    filepath = os.path.join(ensure_result_folder(), filename)
+    schedule.to_csv(filepath, index=False, date_format="%Y-%m-%d")
+    
+    days = schedule["date"].nunique() if len(schedule) else 0
+    print(f"Schedule {start_date} to {end_date}: {len(schedule)} reminders on {days} days")
+    print(f"Schedule saved to {filepath}")
+    return schedule
+
+def parse_args(argv=None):
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Send today's WhatsApp reminders")
+    parser.add_argument(
+        "--forecast", nargs=2, metavar=("START", "END"),
+        help="write the reminders due from START to END (YYYY-MM-DD) instead of sending",
+    )
+    args = parser.parse_args(argv)
+    
+    if args.forecast:
+        try:
+            args.forecast = [datetime.strptime(d, "%Y-%m-%d").date() for d in args.forecast]
+        except ValueError:
+            parser.error("--forecast dates must be YYYY-MM-DD")
+        if args.forecast[0] > args.forecast[1]:
+            parser.error("--forecast START must not be after END")
+    return args
 
 def main():
     """Main function"""
-    # Read Excel file
-    df = read_excel_file()
-    if df is None:
+    args = parse_args()
+    ensure_result_folder()
+    
+    if args.forecast:
+        write_reminder_schedule(*args.forecast)
         return
     
+    try:
+        with metrics.span("total"):
+            run_reminders()
+    finally:
+        # Commit any buffered dispatch state
+        close_outbox()
+        close_history()
+        metrics.write_metrics("reminder")
+
+def run_reminders(df=None, index=None):
+    """
+    Compute today's reminders and send them
+    A caller that keeps the snapshot in memory can pass df and its index
+    Returns the send results, or None if the snapshot could not be read
+    """
+    # Each run starts with a closed circuit
+    reset_send_guard()
+    
+    # Read snapshot file
+    if df is None:
+        with metrics.span("snapshot_load"):
+            df = read_snapshot_file()
+        if df is None:
+            return None
+    
+    # Build the date index once for all reminder rules
+    if index is None:
+        from reminder_index import ReminderIndex
+        
+        with metrics.span("reminder_index"):
+            index = ReminderIndex(df)
+    
     all_results = []
+    sections = []
+    planned = True
     
-    # Send initial reminder messages (if enabled)
-    if ENABLE_INITIAL_REMINDER:
-        initial_results = send_initial_reminder(df)
-        all_results.extend(initial_results)
+    # Reminders missed since the last processed day, sent before today's
+    try:
+        catch_up = plan_catch_up_sections(df)
+    except Exception as e:
+        print(f"ERROR: Failed to plan missed reminders - {str(e)}")
+        catch_up = []
+        planned = False
+    
+    if DIGEST_MODE:
+        # One digest per recipient instead of one message per reminder
+        sections = list(catch_up)
+        try:
+            sections.extend(plan_reminder_sections(df, index))
+        except Exception as e:
+            print(f"ERROR: Failed to plan reminders - {str(e)}")
+            planned = False
+        if sections:
+            all_results.extend(send_reminder_digests(sections))
+    else:
+        sections = catch_up
+        for build_section, kd_survei_list, reminder in catch_up:
+            all_results.extend(send_to_subscribers(kd_survei_list, build_section, reminder))
+        
+        # Send initial reminder messages (if enabled)
+        if ENABLE_INITIAL_REMINDER:
+            initial_results = send_initial_reminder(df, index)
+            all_results.extend(initial_results)
+        
+        # Send final reminder messages
+        final_results = send_final_reminder(df, index)
+        all_results.extend(final_results)
     
-    # Send final reminder messages
-    final_results = send_final_reminder(df)
-    all_results.extend(final_results)
+    if sections and not all_results:
+        print("\nNo reminders left to send today (already sent or no subscribers)")
     
-    # If no reminders were sent, notify admins
-    if not all_results:
+    # If there were no reminders today, notify admins
+    if not sections and not all_results:
         print("\nNo reminders to send today")
         no_reminder_results = send_no_reminder_notification()
         all_results.extend(no_reminder_results)
     
+    # A day whose sends failed because WPPConnect was unavailable stays
+    # unprocessed, the next run catches up on it; a contact that keeps
+    # failing on its own doesn't hold the day back
+    if planned and not any(r["status"] == "Failed" and r.get("retryable") for r in all_results):
+        get_history().mark_processed(get_today_date())
+    
     if not all_results:
         print("No messages sent today")
-        return
+        return all_results
     
-    # Save results
-    save_results(all_results)
+    # Outcomes were appended to the send history during dispatch
+    get_history().flush()
+    print(f"\nSend history: {get_history().path}")
     
     # Print summary
     successful = sum(1 for r in all_results if r["status"] == "Sent")
     failed = sum(1 for r in all_results if r["status"] == "Failed")
-    print(f"\nSummary: {successful} sent, {failed} failed")
+    skipped = sum(1 for r in all_results if r["status"] == "Skipped")
+    print(f"\nSummary: {successful} sent, {failed} failed, {skipped} already sent")
+    return all_results
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,152 @@
+import json
+import os
+
+import pandas as pd
+
+# Snapshot format: "parquet", "arrow", "jsonl" or None to pick the fastest available
+SNAPSHOT_FORMAT = None
+
+# File extension for each snapshot format
+SNAPSHOT_EXTENSIONS = {
+    "parquet": ".parquet",
+    "arrow": ".arrow",
+    "jsonl": ".jsonl",
+}
+
+# Columns holding dates are stored as real dates, not strings
+DATE_COLUMN_PREFIX = "tgl_"
+
+def has_pyarrow():
+    """Check whether pyarrow is installed (needed for parquet and arrow)"""
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+def resolve_format(fmt=None):
+    """Return the snapshot format to use for writing"""
+    fmt = fmt or SNAPSHOT_FORMAT
+    if fmt is None:
+        return "parquet" if has_pyarrow() else "jsonl"
+    if fmt not in SNAPSHOT_EXTENSIONS:
+        raise ValueError(f"Unknown snapshot format: {fmt}")
+    if fmt in ("parquet", "arrow") and not has_pyarrow():
+        print(f"WARNING: pyarrow not installed, writing jsonl snapshot instead of {fmt}")
+        return "jsonl"
+    return fmt
+
+def snapshot_path(name, folder, fmt):
+    """Build the file path of a snapshot"""
+    return os.path.join(folder, name + SNAPSHOT_EXTENSIONS[fmt])
+
+def normalize_dates(df):
+    """Convert every tgl_* column to datetime64 so dates survive the round trip"""
+    for column in df.columns:
+        if str(column).startswith(DATE_COLUMN_PREFIX) and not pd.api.types.is_datetime64_any_dtype(df[column]):
+            df[column] = pd.to_datetime(df[column], errors="coerce")
+    return df
+
+def _write_jsonl(df, filepath):
+    """Write a typed JSONL file: first line is the dtype header, then one record per line"""
+    dtypes = {str(column): str(dtype) for column, dtype in df.dtypes.items()}
+    with open(filepath, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"__dtypes__": dtypes}) + "\n")
+        df.to_json(f, orient="records", lines=True, date_format="iso", force_ascii=False)
+        f.write("\n")
+
+def _read_jsonl(filepath, columns=None):
+    """Read a typed JSONL file written by _write_jsonl"""
+    with open(filepath, "r", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        dtypes = header.get("__dtypes__", {})
+        df = pd.read_json(f, orient="records", lines=True, dtype=False, convert_dates=False)
+    
+    if columns is not None:
+        df = df[[c for c in columns if c in df.columns]]
+    
+    for column in df.columns:
+        dtype = dtypes.get(column, "")
+        if dtype.startswith("datetime64"):
+            df[column] = pd.to_datetime(df[column], errors="coerce")
+        elif dtype.startswith(("int", "float", "bool")):
+            df[column] = df[column].astype(dtype)
+    return df
+
+def save_snapshot(df, name="api_response", folder="result", fmt=None):
+    """
+    Save a DataFrame snapshot, keeping dates as dates
+    Returns the path of the written file
+    """
+    fmt = resolve_format(fmt)
+    os.makedirs(folder, exist_ok=True)
+    filepath = snapshot_path(name, folder, fmt)
+    df = normalize_dates(df.copy())
+    
+    if fmt == "parquet":
+        df.to_parquet(filepath, index=False)
+    elif fmt == "arrow":
+        df.reset_index(drop=True).to_feather(filepath)
+    else:
+        _write_jsonl(df, filepath)
+    
+    return filepath
+
+def find_snapshot(name="api_response", folder="result", fmt=None):
+    """
+    Find an existing snapshot file
+    Returns (path, format), format is "xlsx" for a legacy Excel hand-off
+    """
+    formats = [fmt] if fmt else list(SNAPSHOT_EXTENSIONS)
+    candidates = [(snapshot_path(name, folder, f), f) for f in formats]
+    existing = [(path, f) for path, f in candidates if os.path.exists(path)]
+    
+    if existing:
+        # Prefer the most recently written snapshot
+        return max(existing, key=lambda item: os.path.getmtime(item[0]))
+    
+    legacy_path = os.path.join(folder, name + ".xlsx")
+    if fmt is None and os.path.exists(legacy_path):
+        return legacy_path, "xlsx"
+    
+    return None, None
+
+def snapshot_columns(filepath, fmt):
+    """Column names stored in a parquet or arrow snapshot, read from its schema only"""
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        return pq.read_schema(filepath).names
+    import pyarrow.ipc as ipc
+    with ipc.open_file(filepath) as reader:
+        return reader.schema.names
+
+def load_snapshot(name="api_response", folder="result", fmt=None, columns=None):
+    """
+    Load a snapshot written by save_snapshot (or a legacy xlsx file)
+    columns missing from the snapshot are left out instead of raising
+    """
+    filepath, fmt = find_snapshot(name, folder, fmt)
+    if filepath is None:
+        raise FileNotFoundError(f"No snapshot named '{name}' found in {folder}")
+    
+    if columns is not None and fmt in ("parquet", "arrow"):
+        stored = set(snapshot_columns(filepath, fmt))
+        columns = [c for c in columns if c in stored]
+    
+    if fmt == "parquet":
+        df = pd.read_parquet(filepath, columns=columns)
+    elif fmt == "arrow":
+        df = pd.read_feather(filepath, columns=columns)
+    elif fmt == "jsonl":
+        df = _read_jsonl(filepath, columns=columns)
+    else:
+        df = normalize_dates(pd.read_excel(filepath, usecols=columns))
+    
+    return df
+
+def export_excel(df, name="api_response", folder="result", sheet_name="Data"):
+    """Optional Excel export of a snapshot (slow, for people who open it by hand)"""
+    os.makedirs(folder, exist_ok=True)
+    filepath = os.path.join(folder, name + ".xlsx")
+    df.to_excel(filepath, index=False, sheet_name=sheet_name)
+    return filepath
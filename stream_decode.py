@@ -0,0 +1,219 @@
+# Incremental decoding of large kegiatan-aktif responses
+#
+# The body is read in chunks (gunzipped on the fly) and the records of its
+# `data` list are yielded in fixed-size batches, so the raw text and the full
+# JSON tree are never held in memory at once. Each record is decoded by the
+# json module's C scanner, which is faster than an event-based parser such as
+# ijson building records in Python (see benchmarks/bench_stream_decode.py).
+
+import codecs
+import json
+import os
+import zlib
+
+# Records per batch handed to the caller
+STREAM_BATCH_SIZE = 5000
+
+# Bytes read from the body at a time
+READ_CHUNK_SIZE = 64 * 1024
+
+# Paths of the record list: top-level "data", or a paginator nested in "data"
+RECORD_PREFIXES = ("data", "data.data")
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+def _raw_chunks(source, chunk_size):
+    """Raw byte chunks of bytes, a file path, a file object or an iterable of chunks"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source)
+        for start in range(0, len(view), chunk_size):
+            yield view[start:start + chunk_size]
+    elif isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            yield from iter(lambda: f.read(chunk_size), b"")
+    elif hasattr(source, "read"):
+        yield from iter(lambda: source.read(chunk_size), b"")
+    else:
+        yield from source
+
+def iter_chunks(source, chunk_size=READ_CHUNK_SIZE):
+    """
+    Yield the bytes of a response body, gunzipped on the fly when it is
+    gzip-compressed; each yielded chunk is at most chunk_size bytes
+    """
+    chunks = (chunk for chunk in _raw_chunks(source, chunk_size) if len(chunk))
+    # The gzip magic can straddle chunks, a body may start with a 1-byte chunk
+    head = []
+    head_length = 0
+    for chunk in chunks:
+        head.append(chunk)
+        head_length += len(chunk)
+        if head_length >= 2:
+            break
+    if not head:
+        return
+    
+    if b"".join(bytes(chunk[:2]) for chunk in head)[:2] != GZIP_MAGIC:
+        yield from head
+        yield from chunks
+        return
+    
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    for chunk in _prepend(head, chunks):
+        while chunk:
+            data = decompressor.decompress(chunk, chunk_size)
+            if data:
+                yield data
+            if decompressor.eof:
+                # Concatenated gzip members
+                chunk = decompressor.unused_data
+                decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            else:
+                chunk = decompressor.unconsumed_tail
+    tail = decompressor.flush()
+    if tail:
+        yield tail
+
+def _prepend(head, rest):
+    yield from head
+    yield from rest
+
+def looks_like_json(source):
+    """Check whether a body starts like a JSON object (reads only its first chunk)"""
+    for chunk in iter_chunks(source):
+        text = bytes(chunk).lstrip()
+        if text:
+            return text.startswith(b"{")
+    return False
+
+class _TextStream:
+    """Decoded text of a chunk iterator with a cursor, refilled on demand"""
+    
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.json = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+    
+    def fill(self):
+        """Append the next chunk to the buffer; False at the end of the body"""
+        if self.eof:
+            return False
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.eof = True
+            text = self.decoder.decode(b"", final=True)
+        else:
+            text = self.decoder.decode(chunk)
+        # Drop what has been consumed so the buffer stays one chunk long
+        self.buffer = self.buffer[self.pos:] + text
+        self.pos = 0
+        return True
+    
+    def peek(self):
+        """Next non-whitespace character, without consuming it"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.fill():
+                raise ValueError("Unexpected end of JSON body")
+    
+    def next_char(self):
+        """Consume and return the next non-whitespace character"""
+        char = self.peek()
+        self.pos += 1
+        return char
+    
+    def expect(self, char):
+        found = self.next_char()
+        if found != char:
+            raise ValueError(f"Expected {char!r} in JSON body, found {found!r}")
+    
+    def value(self):
+        """Decode the next complete JSON value, reading more chunks as needed"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.json.raw_decode(self.buffer, self.pos)
+                # A number at the end of the buffer may continue in the next chunk
+                if end < len(self.buffer) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill()
+
+def _array_items(stream):
+    stream.expect("[")
+    if stream.peek() == "]":
+        stream.next_char()
+        return
+    while True:
+        yield stream.value()
+        char = stream.next_char()
+        if char == "]":
+            return
+        if char != ",":
+            raise ValueError(f"Expected ',' or ']' in JSON body, found {char!r}")
+
+def _object_records(stream, envelope, path=""):
+    stream.expect("{")
+    if stream.peek() == "}":
+        stream.next_char()
+        return
+    while True:
+        key = stream.value()
+        stream.expect(":")
+        key_path = f"{path}.{key}" if path else key
+        char = stream.peek()
+        if char == "[" and key_path in RECORD_PREFIXES:
+            envelope[key] = []
+            yield from _array_items(stream)
+        elif char == "{" and key_path + ".data" in RECORD_PREFIXES:
+            envelope[key] = {}
+            yield from _object_records(stream, envelope[key], key_path)
+        else:
+            envelope[key] = stream.value()
+        
+        char = stream.next_char()
+        if char == "}":
+            return
+        if char != ",":
+            raise ValueError(f"Expected ',' or '}}' in JSON body, found {char!r}")
+
+def iter_records(source, envelope=None, chunk_size=READ_CHUNK_SIZE):
+    """
+    Yield the records of a response body's data list one at a time
+    envelope (a dict) receives the rest of the response, with the record list
+    left empty, once the body has been read: pagination metadata can come
+    after the records
+    """
+    envelope = {} if envelope is None else envelope
+    return _read_records(_TextStream(iter_chunks(source, chunk_size)), envelope)
+
+def _read_records(stream, envelope):
+    try:
+        yield from _object_records(stream, envelope)
+        # Read the body to its end (trailing whitespace), so a cache tee over the
+        # chunks stores its entry and the HTTP response is released now, not by GC
+        for _ in stream.chunks:
+            pass
+    finally:
+        # Stopped early: let the chunk source clean up (the tee drops its partial file)
+        stream.chunks.close()
+
+def iter_record_batches(source, batch_size=STREAM_BATCH_SIZE, envelope=None, chunk_size=READ_CHUNK_SIZE):
+    """Yield the records of a response body's data list in lists of at most batch_size"""
+    batch = []
+    for record in iter_records(source, envelope, chunk_size):
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
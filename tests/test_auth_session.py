@@ -0,0 +1,104 @@
+import json
+import os
+import sys
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import download_data
+from kegiatan_api import auth_session_path, save_auth_session
+
+URL = "https://example.test/api/dashboard/kegiatan-aktif"
+PAGES = 5
+ROWS = 20
+
+class StubResponse:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self.headers = {}
+        self.body = json.dumps(payload or {}).encode("utf-8")
+    
+    def json(self):
+        return json.loads(self.body)
+    
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+    
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+    
+    def close(self):
+        pass
+
+class StubApi:
+    """
+    Paginated kegiatan-aktif stub: a token is accepted for a limited number
+    of requests, then answered with 401 like an expired bearer token
+    """
+    
+    def __init__(self):
+        self.uses_left = {}
+        self.requests = []
+        self.rejected = []
+        self.lock = threading.Lock()
+    
+    def issue(self, token, uses=None):
+        self.uses_left[token] = uses
+    
+    def get(self, url, headers=None, timeout=None, stream=False):
+        token = (headers or {}).get("Authorization")
+        page = int(parse_qs(urlsplit(url).query).get("page", ["1"])[0])
+        with self.lock:
+            self.requests.append((token, page))
+            if token not in self.uses_left or self.uses_left[token] == 0:
+                self.rejected.append((token, page))
+                return StubResponse(401)
+            if self.uses_left[token] is not None:
+                self.uses_left[token] -= 1
+        
+        records = [
+            {"kd_survei": f"KD{page}-{i}", "tgl_rek_mulai": "2025-01-01", "tgl_rek_selesai": "2025-01-31"}
+            for i in range(ROWS)
+        ]
+        return StubResponse(200, {"data": {"current_page": page, "last_page": PAGES, "data": records}})
+
+def test_expired_token_mid_pagination_reauthenticates_once(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    api = StubApi()
+    logins = []
+    
+    def browser_login(api_url, account=None, proxy_port=None, cache=None):
+        # Stands in for the SSO login: a new token, saved for the next runs
+        logins.append(account)
+        api.issue("Bearer new")
+        save_auth_session({"Authorization": "Bearer new"}, auth_session_path(account))
+        return download_data.readCapturedFrame(download_data.fetchWithSavedSession(api_url, account, cache), cache)
+    
+    monkeypatch.setattr(download_data, "USE_RESPONSE_CACHE", False)
+    monkeypatch.setattr(download_data, "get_http_session", lambda: api)
+    monkeypatch.setattr(download_data, "runBrowserFlow", browser_login)
+    
+    # The saved token expires after the first page and one more
+    api.issue("Bearer old", uses=2)
+    save_auth_session({"Authorization": "Bearer old"}, auth_session_path())
+    
+    df = download_data.collectAccount(URL)
+    
+    assert logins == [None]
+    # Expired partway through: page 1 was served, a later page rejected
+    assert ("Bearer old", 1) in api.requests
+    assert api.rejected and all(token == "Bearer old" and page > 1 for token, page in api.rejected)
+    expected = [f"KD{page}-{i}" for page in range(1, PAGES + 1) for i in range(ROWS)]
+    assert df["kd_survei"].tolist() == expected
+    
+    # The next run reuses the saved session: no login, every request with the new token
+    api.requests.clear()
+    df = download_data.collectAccount(URL)
+    
+    assert logins == [None]
+    assert {token for token, _ in api.requests} == {"Bearer new"}
+    assert sorted(page for _, page in api.requests) == list(range(1, PAGES + 1))
+    assert df["kd_survei"].tolist() == expected
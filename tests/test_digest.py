@@ -0,0 +1,31 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from digest import build_digests, pack_sections
+
+class StubRegistry:
+    def __init__(self, phones):
+        self.contacts = {phone: {"phone": phone, "name": phone} for phone in phones}
+    
+    def route_groups(self, kd_survei_list):
+        return [(kd_survei_list, list(self.contacts.values()))]
+
+def test_cut_section_is_listed_only_with_its_last_piece():
+    long_section = "\n".join(f"line {i:03d}" for i in range(6))
+    
+    packed = pack_sections(["a" * 5, long_section, "c" * 3], max_length=20)
+    
+    assert [indexes for _, indexes in packed] == [[0], [], [], [1], [2]]
+    assert "\n".join(message for message, _ in packed[1:4]) == long_section
+
+def test_digest_covers_of_a_cut_section_go_on_one_message():
+    registry = StubRegistry(["620", "621"])
+    sections = [(lambda kd: "\n".join(f"{code} {'x' * 12}" for code in kd), ["K1", "K2", "K3"], "final_3")]
+    
+    digests = build_digests(registry, sections, max_length=20)
+    
+    assert [message.split()[0] for message, _, _ in digests] == ["K1", "K2", "K3"]
+    assert all(len(contacts) == 2 for _, contacts, _ in digests)
+    assert [covers for _, _, covers in digests] == [[], [], [("final_3", kd) for kd in ("K1", "K2", "K3")]]
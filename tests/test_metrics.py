@@ -0,0 +1,44 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import download_data
+import metrics
+
+def fake_collect(api_url, account=None, proxy_port=None):
+    metrics.inc("api_pages_total", 3)
+    metrics.observe("page_seconds", 0.2)
+    with metrics.span("api_fetch"):
+        pass
+    return None if account == "broken" else [account]
+
+def test_worker_metrics_are_merged_into_the_parent(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_ENABLED", True)
+    monkeypatch.setattr(download_data, "collectAccount", fake_collect)
+    metrics.reset()
+    metrics.inc("download_errors_total")
+    
+    # Each task runs as in a worker process: its own metrics, returned with the result
+    results = [download_data.collectAccountWorker((account, None, "url")) for account in ("a", "broken")]
+    worker_data = [data for _, _, data in results]
+    assert [c["value"] for c in worker_data[0]["counters"]] == [3]
+    
+    metrics.reset()
+    metrics.inc("download_errors_total")
+    for data in worker_data:
+        metrics.merge(data)
+    data = metrics.snapshot()
+    
+    counters = {c["name"]: c["value"] for c in data["counters"]}
+    assert counters == {"download_errors_total": 1, "api_pages_total": 6}
+    assert data["histograms"]["page_seconds"]["count"] == 2
+    assert "api_fetch" in data["spans"]
+    metrics.reset()
+
+def test_prometheus_output_declares_every_metric_type():
+    data = {"spans": {}, "counters": [], "histograms": {}}
+    lines = metrics.to_prometheus(data, "download").splitlines()
+    
+    assert lines[-2] == "# TYPE reminder_last_run_timestamp_seconds gauge"
+    assert lines[-1].startswith('reminder_last_run_timestamp_seconds{job="download"} ')
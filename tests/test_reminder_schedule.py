@@ -0,0 +1,24 @@
+import os
+import sys
+from datetime import date
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reminder_index import build_date_index
+from reminder_schedule import compute_reminder_schedule
+
+def test_schedule_skips_rows_without_kd_survei_like_the_daily_index():
+    df = pd.DataFrame({
+        "kd_survei": ["A", None, "B", float("nan")],
+        "tgl_rek_mulai": pd.to_datetime(["2025-01-02"] * 4),
+        "tgl_rek_selesai": pd.to_datetime(["2025-01-05"] * 4),
+    })
+    
+    schedule = compute_reminder_schedule(df, date(2025, 1, 1), date(2025, 1, 5), [1, 3])
+    
+    assert schedule["kd_survei"].notna().all()
+    initial = schedule[schedule["reminder_type"] == "initial"]
+    assert initial["kd_survei"].tolist() == build_date_index(df, "tgl_rek_mulai")[date(2025, 1, 2)]
+    assert len(schedule) == 6
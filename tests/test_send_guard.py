@@ -0,0 +1,91 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+import send_whatsapp
+from dispatch import SendGuard, dispatch_messages
+from fake_servers import FakeWppServer
+
+CONTACTS = [{"phone": f"62800{i:07d}", "name": f"Kontak {i}"} for i in range(10)]
+
+@pytest.fixture
+def wpp(monkeypatch):
+    with FakeWppServer(latency=0) as server:
+        monkeypatch.setattr(send_whatsapp, "WPPCONNECT_URL", server.send_url)
+        monkeypatch.setattr(send_whatsapp, "WPPCONNECT_HEALTH_URL", server.base_url + "/api/health")
+        yield server
+
+def make_guard(**options):
+    settings = dict(health_check=send_whatsapp.check_wppconnect_health, max_retries=10, base_delay=0.01,
+                    max_delay=0.05, failure_threshold=2, probe_interval=0.05, max_pause=5.0, seed=0)
+    settings.update(options)
+    return SendGuard(**settings)
+
+def dispatch(guard):
+    return dispatch_messages(CONTACTS, "Pesan", send_whatsapp.send_whatsapp_message,
+                             messages_per_second=1000, max_workers=2, guard=guard)
+
+def test_backoff_waits_at_least_retry_after(wpp):
+    wpp.fail_next(429, retry_after=0.4)
+    guard = make_guard(max_retries=2, max_delay=5.0)
+    
+    start = time.monotonic()
+    assert guard.call(send_whatsapp.send_whatsapp_message, "620", "Pesan") is True
+    
+    assert time.monotonic() - start >= 0.4
+    assert wpp.sent == ["620"]
+    # A longer hint is capped at max_delay
+    assert guard.backoff_delay(60) == 5.0
+
+def test_circuit_opens_after_failure_threshold(wpp):
+    probes = []
+    
+    def health_check():
+        probes.append(wpp.connected)
+        return send_whatsapp.check_wppconnect_health()
+    
+    wpp.fail_next(500, count=3)
+    guard = make_guard(health_check=health_check, failure_threshold=3)
+    opened = []
+    record_failure = guard.record_failure
+    guard.record_failure = lambda: opened.append(record_failure()) or opened[-1]
+    
+    assert guard.call(send_whatsapp.send_whatsapp_message, "620", "Pesan") is True
+    
+    assert opened == [False, False, True]
+    assert probes == [True]
+    assert not guard.is_open and guard.failures == 0
+
+def test_dispatch_resumes_once_health_recovers(wpp):
+    wpp.connected = False
+    reconnect = threading.Timer(0.4, lambda: setattr(wpp, "connected", True))
+    reconnect.start()
+    try:
+        results = dispatch(make_guard())
+    finally:
+        reconnect.cancel()
+    
+    assert [r["status"] for r in results] == ["Sent"] * len(CONTACTS)
+    assert sorted(wpp.sent) == [c["phone"] for c in CONTACTS]
+    assert wpp.rejected >= 2
+
+def test_dispatch_fails_fast_as_retryable_after_max_pause(wpp):
+    wpp.connected = False
+    guard = make_guard(max_pause=0.3)
+    
+    start = time.monotonic()
+    results = dispatch(guard)
+    
+    assert time.monotonic() - start < 2
+    assert guard.gave_up
+    assert all(r["status"] == "Failed" and r.get("retryable") is True for r in results)
+    # Once the guard gave up the remaining sends were not attempted
+    assert wpp.rejected < len(CONTACTS)
+    assert wpp.sent == []
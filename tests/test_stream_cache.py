@@ -0,0 +1,54 @@
+import gzip
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from response_cache import ResponseCache
+from stream_decode import iter_record_batches
+
+URL = "https://example.test/api/dashboard/kegiatan-aktif"
+
+def make_body(rows):
+    records = [{"kd_survei": f"KD{i}", "tgl_rek_selesai": "2025-01-31"} for i in range(rows)]
+    return gzip.compress(json.dumps({"success": True, "data": records, "total": rows}).encode("utf-8"))
+
+def chunked(body, size=4096):
+    for start in range(0, len(body), size):
+        yield body[start:start + size]
+
+def test_streamed_read_stores_the_cache_entry(tmp_path):
+    cache = ResponseCache(folder=str(tmp_path))
+    body = make_body(3000)
+    envelope = {}
+    
+    chunks = cache.tee_body(URL, chunked(body), {"ETag": '"v1"'})
+    rows = sum(len(batch) for batch in iter_record_batches(chunks, 500, envelope))
+    
+    assert rows == 3000
+    assert envelope["total"] == 3000
+    entry = cache.get(URL)
+    assert entry is not None and entry["etag"] == '"v1"'
+    assert cache.has_body(URL, entry)
+    with open(cache.body_path(URL), "rb") as f:
+        assert f.read() == body
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+def test_abandoned_read_leaves_no_cache_entry(tmp_path):
+    cache = ResponseCache(folder=str(tmp_path))
+    
+    batches = iter_record_batches(cache.tee_body(URL, chunked(make_body(3000))), 500)
+    next(batches)
+    batches.close()
+    
+    assert cache.get(URL) is None
+    assert os.listdir(tmp_path) == []
+
+def test_gzip_body_starting_with_a_one_byte_chunk_is_gunzipped():
+    body = make_body(50)
+    chunks = [body[:1], body[1:2]] + list(chunked(body[2:], 100))
+    
+    rows = sum(len(batch) for batch in iter_record_batches(iter(chunks), 20))
+    
+    assert rows == 50
@@ -1,91 +1,456 @@
-const wppconnect = require('@wppconnect-team/wppconnect');
+const crypto = require('crypto');
 const express = require('express');
-const app = express();
-
-app.use(express.json());
-
-let client;
-
-// Initialize WhatsApp connection
-wppconnect
-  .create({
-    session: 'bot',
-    headless: true,
-    devtools: false,
-    useChrome: true,
-  })
-  .then((cli) => {
-    client = cli;
-    console.log('\n✓ WhatsApp connected!');
-    console.log('Ready to send messages...\n');
-  })
-  .catch((error) => {
-    console.error('✗ Failed to connect WhatsApp:', error);
-  });
 
-// Health check endpoint
-app.get('/api/health', (req, res) => {
-  if (client) {
-    res.json({ status: 'connected' });
-  } else {
-    res.status(503).json({ status: 'disconnected' });
+// WhatsApp sessions to run, comma separated (each one is a phone/number)
+const SESSIONS = (process.env.WPP_SESSIONS || 'bot')
+  .split(',')
+  .map((name) => name.trim())
+  .filter(Boolean);
+
+// Points per session on the hash ring, more points spread phones more evenly
+const VIRTUAL_NODES = parseInt(process.env.VIRTUAL_NODES || '100', 10);
+
+// Maximum number of sendText calls in flight for one batch request
+const SEND_CONCURRENCY = parseInt(process.env.SEND_CONCURRENCY || '4', 10);
+
+// Maximum number of messages accepted in one batch request
+const MAX_BATCH_SIZE = parseInt(process.env.MAX_BATCH_SIZE || '500', 10);
+
+// Default sending rate of batch requests (messages per second, 0 = unpaced);
+// a request can set its own with `ratePerSecond`
+const MESSAGES_PER_SECOND = parseFloat(process.env.MESSAGES_PER_SECOND || '0');
+
+// Format phone number (add @c.us for WhatsApp)
+function formatPhone(phone) {
+  phone = String(phone);
+  return phone.includes('@') ? phone : phone + '@c.us';
+}
+
+// 32-bit position of a key on the hash ring
+function hashKey(key) {
+  return crypto.createHash('md5').update(String(key)).digest().readUInt32BE(0);
+}
+
+// Pool of WhatsApp sessions. Phones are sharded across sessions by consistent
+// hashing, so a contact always gets its messages from the same sender; when
+// that session is down, the next connected session on the ring takes over.
+class SessionPool {
+  constructor(names = SESSIONS, virtualNodes = VIRTUAL_NODES) {
+    this.names = names.length ? names : ['bot'];
+    this.clients = new Map();
+    this.states = new Map(this.names.map((name) => [name, 'starting']));
+
+    this.ring = [];
+    for (const name of this.names) {
+      for (let i = 0; i < virtualNodes; i++) {
+        this.ring.push({ hash: hashKey(`${name}#${i}`), name });
+      }
+    }
+    this.ring.sort((a, b) => a.hash - b.hash);
+  }
+
+  // Pool with one session whose client comes from a getter
+  static fromGetter(getClient, name = 'bot') {
+    const pool = new SessionPool([name], 1);
+    pool.getClient = () => getClient();
+    pool.isConnected = () => Boolean(getClient());
+    return pool;
+  }
+
+  setClient(name, client) {
+    this.clients.set(name, client);
+    this.states.set(name, client ? 'connected' : 'disconnected');
+  }
+
+  setState(name, state) {
+    this.states.set(name, state);
+  }
+
+  getClient(name) {
+    return this.clients.get(name);
+  }
+
+  isConnected(name) {
+    return Boolean(this.getClient(name)) && this.states.get(name) === 'connected';
+  }
+
+  // Sessions in ring order starting at the phone's position: the owner of
+  // the phone first, then its failover candidates
+  candidates(phone) {
+    const hash = hashKey(phone);
+    let low = 0;
+    let high = this.ring.length;
+    while (low < high) {
+      const mid = (low + high) >> 1;
+      if (this.ring[mid].hash < hash) {
+        low = mid + 1;
+      } else {
+        high = mid;
+      }
+    }
+
+    const order = [];
+    for (let i = 0; i < this.ring.length && order.length < this.names.length; i++) {
+      const { name } = this.ring[(low + i) % this.ring.length];
+      if (!order.includes(name)) {
+        order.push(name);
+      }
+    }
+    return order;
+  }
+
+  // Connected session for a phone: { session, client, failover } or null
+  route(phone) {
+    const order = this.candidates(phone);
+    for (const name of order) {
+      if (this.isConnected(name)) {
+        return { session: name, client: this.getClient(name), failover: name !== order[0] };
+      }
+    }
+    return null;
+  }
+
+  // Next connected session after `session` in the phone's ring order, to
+  // retry a send that failed there: { session, client, failover } or null
+  nextRoute(phone, session) {
+    const order = this.candidates(phone);
+    for (const name of order.slice(order.indexOf(session) + 1)) {
+      if (this.isConnected(name)) {
+        return { session: name, client: this.getClient(name), failover: true };
+      }
+    }
+    return null;
+  }
+
+  // Per-session status for /api/health
+  health() {
+    const sessions = this.names.map((name) => ({
+      session: name,
+      status: this.isConnected(name) ? 'connected' : (this.states.get(name) || 'disconnected')
+    }));
+    const connected = sessions.filter((s) => s.status === 'connected').length;
+    return {
+      status: connected === sessions.length ? 'connected' : (connected ? 'degraded' : 'disconnected'),
+      connected,
+      total: sessions.length,
+      sessions
+    };
+  }
+}
+
+// Spaces out sends across requests and sessions: each wait() returns at the
+// next free slot, 1 / rate seconds after the previous one
+class Pacer {
+  constructor() {
+    this.nextAt = 0;
+  }
+
+  wait(rate) {
+    const now = Date.now();
+    const at = Math.max(now, this.nextAt);
+    this.nextAt = at + 1000 / rate;
+    return at > now ? new Promise((resolve) => setTimeout(resolve, at - now)) : Promise.resolve();
+  }
+}
+
+// Send a batch of { phone, message } items with at most `concurrency`
+// sendText calls in flight, awaiting `pace()` (if given) before each one.
+// Returns one status object per item, in order.
+async function sendBatch(client, items, concurrency = SEND_CONCURRENCY, pace = null) {
+  const results = new Array(items.length);
+  let next = 0;
+
+  async function worker() {
+    while (next < items.length) {
+      const index = next++;
+      const { phone, message } = items[index] || {};
+
+      if (!phone || !message) {
+        results[index] = {
+          index,
+          phone: phone || null,
+          success: false,
+          error: 'phone and message are required'
+        };
+        continue;
+      }
+
+      try {
+        if (pace) {
+          await pace();
+        }
+        await client.sendText(formatPhone(phone), message);
+        results[index] = {
+          index,
+          phone,
+          success: true,
+          sentAt: new Date().toISOString()
+        };
+      } catch (error) {
+        console.error(`Error sending message to ${phone}:`, error);
+        results[index] = {
+          index,
+          phone,
+          success: false,
+          error: error.message
+        };
+      }
+    }
+  }
+
+  const workers = Math.max(1, Math.min(concurrency, items.length));
+  await Promise.all(Array.from({ length: workers }, worker));
+  return results;
+}
+
+// Send the { route, entries } groups of sendSharded in parallel, storing each
+// item's status object in `results` tagged with the session that sent it
+async function sendGroups(groups, results, concurrency, pace) {
+  await Promise.all(Array.from(groups.values()).map(async ({ route, entries }) => {
+    const client = route ? route.client : null;
+    const groupResults = await sendBatch(client, entries.map((e) => e.item), concurrency, pace);
+    groupResults.forEach((result, i) => {
+      results[entries[i].index] = Object.assign(result, { index: entries[i].index }, route ? {
+        session: route.session,
+        failover: route.failover
+      } : {});
+    });
+  }));
+}
+
+// Add an item to the group of its route's session
+function addToGroup(groups, route, index, item) {
+  const key = route ? route.session : null;
+  if (!groups.has(key)) {
+    groups.set(key, { route, entries: [] });
   }
-});
+  groups.get(key).entries.push({ index, item });
+}
+
+// Send a batch through the session pool: items are grouped by the session
+// their phone routes to and the groups are sent in parallel, each with at
+// most `concurrency` sendText calls in flight; `pace` is shared by all
+// groups. A message whose sendText fails is retried once on the next
+// connected session of its phone's ring order. Returns one status object per
+// item, in order, tagged with the session that sent it.
+async function sendSharded(pool, items, concurrency = SEND_CONCURRENCY, pace = null) {
+  const results = new Array(items.length);
+  const groups = new Map();
+
+  items.forEach((item, index) => {
+    const route = item && item.phone ? pool.route(item.phone) : null;
+    if (item && item.phone && !route) {
+      results[index] = {
+        index,
+        phone: item.phone,
+        success: false,
+        error: 'No WhatsApp session connected'
+      };
+      return;
+    }
+    // Invalid items go through sendBatch to get its validation error
+    addToGroup(groups, route, index, item);
+  });
+
+  await sendGroups(groups, results, concurrency, pace);
+
+  // A session can still report connected while its sends fail
+  const retries = new Map();
+  items.forEach((item, index) => {
+    const result = results[index];
+    if (result.success || !result.session || !item.message) {
+      return;
+    }
+    const route = pool.nextRoute(item.phone, result.session);
+    if (route) {
+      addToGroup(retries, route, index, item);
+    }
+  });
+  await sendGroups(retries, results, concurrency, pace);
+
+  return results;
+}
+
+// Build the express app around a SessionPool (or a getter for a single
+// WhatsApp client), so the clients can be swapped for mocks
+function createApp(poolOrGetClient) {
+  const pool = typeof poolOrGetClient === 'function'
+    ? SessionPool.fromGetter(poolOrGetClient)
+    : poolOrGetClient;
+  const app = express();
+  const pacer = new Pacer();
+
+  app.use(express.json({ limit: '5mb' }));
+
+  // Health check endpoint: 200 while at least one session is connected
+  app.get('/api/health', (req, res) => {
+    const health = pool.health();
+    res.status(health.connected ? 200 : 503).json(health);
+  });
+
+  // Send message endpoint
+  app.post('/api/sendMessage', async (req, res) => {
+    try {
+      const { phone, message } = req.body;
+
+      if (!phone || !message) {
+        return res.status(400).json({
+          success: false,
+          error: 'phone and message are required'
+        });
+      }
+
+      let route = pool.route(phone);
+      if (!route) {
+        return res.status(503).json({
+          success: false,
+          error: 'WhatsApp client not connected',
+          sessions: pool.health().sessions
+        });
+      }
 
-// Send message endpoint
-app.post('/api/sendMessage', async (req, res) => {
-  try {
-    const { phone, message } = req.body;
+      try {
+        await route.client.sendText(formatPhone(phone), message);
+      } catch (error) {
+        // Retry once on the next connected session of the ring
+        const retry = pool.nextRoute(phone, route.session);
+        if (!retry) {
+          throw error;
+        }
+        console.error(`Error sending message via '${route.session}', retrying via '${retry.session}':`, error);
+        await retry.client.sendText(formatPhone(phone), message);
+        route = retry;
+      }
 
-    if (!phone || !message) {
-      return res.status(400).json({
+      res.json({
+        success: true,
+        message: 'Message sent successfully',
+        phone: phone,
+        session: route.session,
+        failover: route.failover,
+        sentAt: new Date().toISOString()
+      });
+    } catch (error) {
+      console.error('Error sending message:', error);
+      res.status(500).json({
         success: false,
-        error: 'phone and message are required'
+        error: error.message
       });
     }
+  });
+
+  // Batch send endpoint: { messages: [{ phone, message }, ...], ratePerSecond }
+  app.post('/api/sendMessages', async (req, res) => {
+    try {
+      const { messages } = req.body;
+      const rate = req.body.ratePerSecond === undefined ? MESSAGES_PER_SECOND : Number(req.body.ratePerSecond);
+
+      if (!Array.isArray(messages) || messages.length === 0) {
+        return res.status(400).json({
+          success: false,
+          error: 'messages must be a non-empty array'
+        });
+      }
+
+      if (messages.length > MAX_BATCH_SIZE) {
+        return res.status(413).json({
+          success: false,
+          error: `at most ${MAX_BATCH_SIZE} messages per batch`
+        });
+      }
+
+      if (!Number.isFinite(rate) || rate < 0) {
+        return res.status(400).json({
+          success: false,
+          error: 'ratePerSecond must be a number >= 0'
+        });
+      }
 
-    if (!client) {
-      return res.status(503).json({
+      if (!pool.health().connected) {
+        return res.status(503).json({
+          success: false,
+          error: 'WhatsApp client not connected',
+          sessions: pool.health().sessions
+        });
+      }
+
+      const pace = rate > 0 ? () => pacer.wait(rate) : null;
+      const results = await sendSharded(pool, messages, SEND_CONCURRENCY, pace);
+      const sent = results.filter((r) => r.success).length;
+
+      res.json({
+        success: sent === results.length,
+        sent: sent,
+        failed: results.length - sent,
+        results: results
+      });
+    } catch (error) {
+      console.error('Error sending batch:', error);
+      res.status(500).json({
         success: false,
-        error: 'WhatsApp client not connected'
+        error: error.message
       });
     }
+  });
 
-    // Format phone number (add @c.us for WhatsApp)
-    const formattedPhone = phone.includes('@') ? phone : phone + '@c.us';
+  return app;
+}
 
-    await client.sendText(formattedPhone, message);
+module.exports = { createApp, sendBatch, sendSharded, formatPhone, hashKey, Pacer, SessionPool };
 
-    res.json({
-      success: true,
-      message: 'Message sent successfully',
-      phone: phone,
-      sentAt: new Date().toISOString()
-    });
-  } catch (error) {
-    console.error('Error sending message:', error);
-    res.status(500).json({
-      success: false,
-      error: error.message
-    });
-  }
-});
-
-// Start server
-const PORT = 21465;
-app.listen(PORT, () => {
-  console.log(`\n${'='.repeat(50)}`);
-  console.log(`WPPConnect server running on http://localhost:${PORT}`);
-  console.log(`${'='.repeat(50)}\n`);
-  console.log('Waiting for WhatsApp connection...');
-  console.log('If no QR code appears, check if browser opened.\n');
-});
-
-// Graceful shutdown
-process.on('SIGINT', async () => {
-  console.log('\nShutting down...');
-  if (client) {
-    await client.close();
+if (require.main === module) {
+  const wppconnect = require('@wppconnect-team/wppconnect');
+
+  const pool = new SessionPool(SESSIONS);
+
+  // Initialize one WhatsApp connection per session
+  for (const name of pool.names) {
+    wppconnect
+      .create({
+        session: name,
+        headless: true,
+        devtools: false,
+        useChrome: true,
+      })
+      .then((cli) => {
+        pool.setClient(name, cli);
+        console.log(`\n✓ WhatsApp session '${name}' connected!`);
+        console.log('Ready to send messages...\n');
+
+        // Route around the session while it is not connected
+        cli.onStateChange((state) => {
+          const status = state === 'CONNECTED' ? 'connected' : 'disconnected';
+          if (pool.states.get(name) !== status) {
+            console.log(`WhatsApp session '${name}' is ${status} (${state})`);
+          }
+          pool.setState(name, status);
+        });
+      })
+      .catch((error) => {
+        pool.setState(name, 'failed');
+        console.error(`✗ Failed to connect WhatsApp session '${name}':`, error);
+      });
   }
-  process.exit(0);
-});
+
+  const app = createApp(pool);
+
+  // Start server
+  const PORT = 21465;
+  app.listen(PORT, () => {
+    console.log(`\n${'='.repeat(50)}`);
+    console.log(`WPPConnect server running on http://localhost:${PORT}`);
+    console.log(`${'='.repeat(50)}\n`);
+    console.log('Waiting for WhatsApp connection...');
+    console.log('If no QR code appears, check if browser opened.\n');
+  });
+
+  // Graceful shutdown
+  process.on('SIGINT', async () => {
+    console.log('\nShutting down...');
+    await Promise.all(pool.names.map((name) => {
+      const client = pool.getClient(name);
+      return client ? client.close() : null;
+    }));
+    process.exit(0);
+  });
+}
@@ -0,0 +1,175 @@
+const assert = require('node:assert');
+const { test } = require('node:test');
+
+const { createApp, sendBatch, sendSharded, Pacer, SessionPool } = require('../server');
+
+// Stand-in for a wppconnect client: records every sendText call, fails for
+// the phones in `failing` and answers after `delays[phone]` milliseconds
+function stubClient({ failing = [], delays = {} } = {}) {
+  const sent = [];
+  return {
+    sent,
+    async sendText(to, message) {
+      const phone = to.replace('@c.us', '');
+      await new Promise((resolve) => setTimeout(resolve, delays[phone] || 0));
+      if (failing.includes(phone)) {
+        throw new Error(`send to ${phone} failed`);
+      }
+      sent.push({ to, message, at: Date.now() });
+    }
+  };
+}
+
+// Pool of connected sessions named `names`, each with its own stub client
+function stubPool(names, options = {}) {
+  const pool = new SessionPool(names, 50);
+  for (const name of names) {
+    pool.setClient(name, stubClient(options[name]));
+  }
+  return pool;
+}
+
+const PHONES = Array.from({ length: 300 }, (_, i) => `6281${String(i).padStart(6, '0')}`);
+
+// Start the app on a free port and POST `body` to `path`
+async function post(app, path, body) {
+  const server = app.listen(0);
+  await new Promise((resolve) => server.once('listening', resolve));
+  try {
+    const response = await fetch(`http://127.0.0.1:${server.address().port}${path}`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify(body)
+    });
+    return { status: response.status, body: await response.json() };
+  } finally {
+    server.close();
+  }
+}
+
+test('sendBatch keeps request order and reports each failure', async () => {
+  // The first item answers last, so results complete out of order
+  const client = stubClient({ failing: ['622'], delays: { '620': 30 } });
+  const items = [
+    { phone: '620', message: 'a' },
+    { phone: '621', message: 'b' },
+    { phone: '622', message: 'c' },
+    { phone: '', message: 'd' }
+  ];
+
+  const results = await sendBatch(client, items, 4);
+
+  assert.deepStrictEqual(results.map((r) => r.index), [0, 1, 2, 3]);
+  assert.deepStrictEqual(results.map((r) => r.success), [true, true, false, false]);
+  assert.strictEqual(results[2].error, 'send to 622 failed');
+  assert.strictEqual(results[3].error, 'phone and message are required');
+  assert.deepStrictEqual(client.sent.map((s) => s.to), ['621@c.us', '620@c.us']);
+});
+
+test('sendBatch spaces out sends at the pacer rate', async () => {
+  const client = stubClient();
+  const pacer = new Pacer();
+  const items = Array.from({ length: 5 }, (_, i) => ({ phone: `62${i}`, message: 'm' }));
+
+  await sendBatch(client, items, 4, () => pacer.wait(50));
+
+  const times = client.sent.map((s) => s.at).sort((a, b) => a - b);
+  // 5 sends at 50/s take at least 4 intervals of 20ms (minus timer slack)
+  assert.ok(times[4] - times[0] >= 75, `sent within ${times[4] - times[0]}ms`);
+});
+
+test('POST /api/sendMessages answers per item, in order', async () => {
+  const client = stubClient({ failing: ['621'] });
+  const app = createApp(() => client);
+
+  const { status, body } = await post(app, '/api/sendMessages', {
+    messages: [
+      { phone: '620', message: 'a' },
+      { phone: '621', message: 'b' },
+      { phone: '622', message: 'c' }
+    ],
+    ratePerSecond: 100
+  });
+
+  assert.strictEqual(status, 200);
+  assert.strictEqual(body.success, false);
+  assert.strictEqual(body.sent, 2);
+  assert.strictEqual(body.failed, 1);
+  assert.deepStrictEqual(body.results.map((r) => [r.index, r.phone, r.success]), [
+    [0, '620', true],
+    [1, '621', false],
+    [2, '622', true]
+  ]);
+});
+
+test('POST /api/sendMessages rejects a bad rate and a missing client', async () => {
+  const app = createApp(() => stubClient());
+  const badRate = await post(app, '/api/sendMessages', { messages: [{ phone: '620', message: 'a' }], ratePerSecond: -1 });
+  assert.strictEqual(badRate.status, 400);
+
+  const down = createApp(() => null);
+  const unavailable = await post(down, '/api/sendMessages', { messages: [{ phone: '620', message: 'a' }] });
+  assert.strictEqual(unavailable.status, 503);
+});
+
+test('SessionPool.fromGetter routes every phone to the single session', () => {
+  const client = stubClient();
+  const pool = SessionPool.fromGetter(() => client);
+  assert.deepStrictEqual(pool.route('620'), { session: 'bot', client, failover: false });
+});
+
+test('SessionPool spreads phones over every session and keeps each on one owner', () => {
+  const pool = stubPool(['bot1', 'bot2', 'bot3']);
+  const owners = PHONES.map((phone) => pool.route(phone).session);
+
+  for (const name of pool.names) {
+    assert.ok(owners.filter((owner) => owner === name).length > 30, `${name} owns too few phones`);
+  }
+  assert.deepStrictEqual(PHONES.map((phone) => pool.route(phone).session), owners);
+  assert.ok(PHONES.every((phone) => pool.candidates(phone).length === 3));
+});
+
+test('SessionPool fails over only the phones of a disconnected session', () => {
+  const pool = stubPool(['bot1', 'bot2', 'bot3']);
+  const owners = new Map(PHONES.map((phone) => [phone, pool.route(phone).session]));
+
+  pool.setState('bot2', 'disconnected');
+  for (const phone of PHONES) {
+    const route = pool.route(phone);
+    if (owners.get(phone) === 'bot2') {
+      assert.strictEqual(route.session, pool.candidates(phone)[1]);
+      assert.strictEqual(route.failover, true);
+    } else {
+      assert.deepStrictEqual([route.session, route.failover], [owners.get(phone), false]);
+    }
+  }
+
+  pool.setState('bot2', 'connected');
+  assert.ok(PHONES.every((phone) => pool.route(phone).session === owners.get(phone)));
+});
+
+test('sendSharded retries a failed send once on the next session of the ring', async () => {
+  const phone = PHONES[0];
+  const probe = stubPool(['bot1', 'bot2', 'bot3']);
+  const [owner, next] = probe.candidates(phone);
+  // The owner still reports connected but every send through it fails
+  const pool = stubPool(['bot1', 'bot2', 'bot3'], { [owner]: { failing: PHONES } });
+
+  const results = await sendSharded(pool, [{ phone, message: 'a' }]);
+
+  assert.strictEqual(results[0].success, true);
+  assert.strictEqual(results[0].session, next);
+  assert.strictEqual(results[0].failover, true);
+  assert.strictEqual(pool.getClient(owner).sent.length, 0);
+  assert.strictEqual(pool.getClient(next).sent.length, 1);
+});
+
+test('sendSharded reports the failure when every session fails the send', async () => {
+  const failing = { failing: PHONES };
+  const pool = stubPool(['bot1', 'bot2'], { bot1: failing, bot2: failing });
+
+  const results = await sendSharded(pool, [{ phone: PHONES[0], message: 'a' }, { phone: PHONES[1], message: 'b' }]);
+
+  assert.deepStrictEqual(results.map((r) => [r.index, r.success, r.failover]), [[0, false, true], [1, false, true]]);
+  assert.deepStrictEqual(results.map((r) => r.error), [`send to ${PHONES[0]} failed`, `send to ${PHONES[1]} failed`]);
+});